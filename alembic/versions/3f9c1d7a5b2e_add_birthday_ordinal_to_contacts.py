@@ -0,0 +1,33 @@
+"""Add birthday_ordinal to contacts
+
+Revision ID: 3f9c1d7a5b2e
+Revises: 88af5919d373
+Create Date: 2026-10-18 10:12:41.208316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1d7a5b2e'
+down_revision: Union[str, None] = '88af5919d373'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Generated column, so existing rows are filled in by PostgreSQL when it is added
+    op.add_column('contacts', sa.Column(
+        'birthday_ordinal', sa.Integer(),
+        sa.Computed('CAST(EXTRACT(month FROM birthday) * 100 + EXTRACT(day FROM birthday) AS INTEGER)', persisted=True),
+        nullable=True
+    ))
+    op.create_index('ix_contacts_owner_id_birthday_ordinal', 'contacts', ['owner_id', 'birthday_ordinal'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_owner_id_birthday_ordinal', table_name='contacts')
+    op.drop_column('contacts', 'birthday_ordinal')
@@ -0,0 +1,36 @@
+"""Add deleted_contacts tombstones and contacts updated_at index
+
+Revision ID: 5e0b9c4d7a61
+Revises: d2a86f3e1c47
+Create Date: 2026-10-18 15:02:44.118306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b9c4d7a61'
+down_revision: Union[str, None] = 'd2a86f3e1c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('deleted_contacts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_deleted_contacts_owner_id_deleted_at', 'deleted_contacts', ['owner_id', 'deleted_at'], unique=False)
+    op.create_index('ix_contacts_owner_id_updated_at', 'contacts', ['owner_id', 'updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contacts_owner_id_updated_at', table_name='contacts')
+    op.drop_index('ix_deleted_contacts_owner_id_deleted_at', table_name='deleted_contacts')
+    op.drop_table('deleted_contacts')
@@ -0,0 +1,35 @@
+"""Add owner-scoped indexes to contacts, email unique per owner
+
+Revision ID: 9c3f5e2b8d14
+Revises: 5e0b9c4d7a61
+Create Date: 2026-10-18 18:40:12.604931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c3f5e2b8d14'
+down_revision: Union[str, None] = '5e0b9c4d7a61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_contacts_owner_id_id', 'contacts', ['owner_id', 'id'], unique=False)
+    op.create_index('ix_contacts_owner_id_last_name_first_name', 'contacts',
+                    ['owner_id', 'last_name', 'first_name'], unique=False)
+    # Different users may have contacts with the same email
+    op.create_index('uq_contacts_owner_id_email', 'contacts', ['owner_id', 'email'], unique=True)
+    op.drop_index('ix_contacts_email', table_name='contacts')
+
+
+def downgrade() -> None:
+    # Fails if different users have contacts with the same email by now
+    op.create_index('ix_contacts_email', 'contacts', ['email'], unique=True)
+    op.drop_index('uq_contacts_owner_id_email', table_name='contacts')
+    op.drop_index('ix_contacts_owner_id_last_name_first_name', table_name='contacts')
+    op.drop_index('ix_contacts_owner_id_id', table_name='contacts')
@@ -0,0 +1,39 @@
+"""Convert avatars stored as file paths to content-addressed variants
+
+Revision ID: c5a8e3f1d6b2
+Revises: 9c3f5e2b8d14
+Create Date: 2026-10-18 21:12:37.418265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.avatars import convert_legacy_avatar, is_avatar_digest, link_user_avatar
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a8e3f1d6b2'
+down_revision: Union[str, None] = '9c3f5e2b8d14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    users = connection.execute(sa.text("SELECT id, avatar FROM users WHERE avatar IS NOT NULL")).all()
+    for user_id, avatar in users:
+        if is_avatar_digest(avatar):
+            continue
+        # the old path, relative to the application's working directory; cleared if it can't be converted
+        digest = convert_legacy_avatar(avatar)
+        if digest:
+            link_user_avatar(user_id, digest)
+        connection.execute(sa.text("UPDATE users SET avatar = :avatar WHERE id = :id"),
+                           {"avatar": digest, "id": user_id})
+
+
+def downgrade() -> None:
+    # The digests are kept: the original file paths are not recorded
+    pass
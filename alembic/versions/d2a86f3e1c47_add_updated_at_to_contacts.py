@@ -0,0 +1,29 @@
+"""Add updated_at to contacts
+
+Revision ID: d2a86f3e1c47
+Revises: b7e4a2c91f03
+Create Date: 2026-10-18 14:21:09.512873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a86f3e1c47'
+down_revision: Union[str, None] = 'b7e4a2c91f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The server default fills in existing rows
+    op.add_column('contacts', sa.Column(
+        'updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False
+    ))
+
+
+def downgrade() -> None:
+    op.drop_column('contacts', 'updated_at')
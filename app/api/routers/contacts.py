@@ -4,87 +4,253 @@ Contact Routers
 This module contains routes for managing user contacts.
 """
 import datetime
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer
 
-from app.api.schemas import ContactCreate, ContactResponse
-from app.services.contact_service import ContactService
+from app.api.schemas import (
+    ContactBatch, ContactBulkResult, ContactBulkUpdate, ContactChanges, ContactCreate, ContactIds,
+    ContactImportResult, ContactPage, ContactResponse, ContactUpdate
+)
+from app.services.contact_service import CONTACT_FIELDS, ContactService, page_json
+from app.utils.contact_export import EXPORT_FORMATS
+from app.utils.contact_import import parse_csv, parse_ndjson
+from app.utils.etag import etag_matches, make_etag
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 DEFAULT_PERIOD = 7  # days
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+FIELDS_DESCRIPTION = "Comma-separated fields to return, e.g. `first_name,last_name,phone` (the id is always returned)"
+IMPORT_PARSERS = {
+    "text/csv": parse_csv,
+    "application/x-ndjson": parse_ndjson,
+    "application/ndjson": parse_ndjson,
+}
 
 router = APIRouter(prefix="/contacts", tags=["Contacts"],
     dependencies=[Depends(oauth2_scheme)]  # Enforce security globally for all endpoints
 )
 
-@router.get("/", response_model=list[ContactResponse])
-def read_contacts(
+
+def _validator_headers(user_id: int, version: int | None) -> dict:
+    """ETag of a response built from the given version of a user's contacts (none if it is unknown)."""
+    if version is None:
+        return {}
+    # no-cache: clients may keep the response, but must revalidate it with If-None-Match
+    return {"ETag": make_etag(user_id, version), "Cache-Control": "private, no-cache"}
+
+
+def _not_modified(request: Request, headers: dict) -> bool:
+    return "ETag" in headers and etag_matches(request.headers.get("if-none-match"), headers["ETag"])
+
+
+def _parse_fields(fields: str | None) -> list[str]:
+    """Requested fields of a listing; all of them by default."""
+    parsed = [field.strip() for field in fields.split(",") if field.strip()] if fields else []
+    return parsed or list(CONTACT_FIELDS)
+
+
+def _page(rows, next_cursor: str | None) -> Response:
+    # listings read rows, which are serialised directly rather than validated through ContactPage
+    return Response(content=page_json(rows, next_cursor), media_type="application/json")
+
+
+@router.get("/", response_model=ContactPage)
+async def read_contacts(
+        request: Request,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str = Query(None),
+        fields: str = Query(None, description=FIELDS_DESCRIPTION),
         contact_service: ContactService = Depends()
 ):
-    """Retrieve all contacts for the current user."""
-    return contact_service.get_all_contacts()
+    """
+    Retrieve a page of contacts for the current user.
+
+    The response carries an ETag that changes whenever any of the user's contacts changes;
+    sending it back in `If-None-Match` gets `304 Not Modified` without reading the contacts.
+    """
+    version = await contact_service.get_contacts_version()
+    headers = _validator_headers(contact_service.user.id, version)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    try:
+        page = await contact_service.get_all_contacts_json(limit, cursor, version, _parse_fields(fields))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # already serialised (and possibly cached) as a ContactPage
+    return Response(content=page, media_type="application/json", headers=headers)
+
+
+# declared before /{contact_id} so "export" and "changes" aren't taken for a contact id
+@router.get("/export", response_class=StreamingResponse)
+async def export_contacts(
+        format: Literal["csv", "ndjson"] = Query("csv"),
+        contact_service: ContactService = Depends()
+):
+    """Export all contacts of the current user as CSV or NDJSON, streamed as they are read."""
+    serializer, media_type = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        serializer(contact_service.export_contacts()),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'},
+    )
+
+
+@router.get("/changes", response_model=ContactChanges)
+async def get_contact_changes(
+        since: str = Query(None, description="`next_token` of the previous sync; omit for a full sync"),
+        limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        contact_service: ContactService = Depends()
+):
+    """
+    Retrieve contacts created, updated or deleted since the previous sync.
+
+    Pass the returned `next_token` as `since` next time; while `has_more` is true, call again right away.
+    Changes may be repeated across syncs, so apply them idempotently.
+    """
+    try:
+        changed, deleted, next_token, has_more = await contact_service.get_changes(since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"changed": changed, "deleted": deleted, "next_token": next_token, "has_more": has_more}
 
 
 @router.get("/{contact_id}", response_model=ContactResponse)
-def read_contact(
+async def read_contact(
     contact_id: int,
+        request: Request,
         contact_service: ContactService = Depends()
 ):
-    contact = contact_service.get_contact_by_id(contact_id)
+    """Retrieve a contact; supports `If-None-Match` like `read_contacts`."""
+    version = await contact_service.get_contacts_version()
+    headers = _validator_headers(contact_service.user.id, version)
+    if _not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+    contact = await contact_service.get_contact_json(contact_id, version)
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
-    return contact
+    return Response(content=contact, media_type="application/json", headers=headers)
 
 
 @router.post("/", response_model=ContactResponse)
-def create_contact(contact: ContactCreate,
-                   contact_service: ContactService = Depends()
+async def create_contact(contact: ContactCreate,
+                         contact_service: ContactService = Depends()
 ):
-    return contact_service.create_contact(contact)
+    return await contact_service.create_contact(contact)
+
+
+@router.post("/bulk", response_model=ContactImportResult)
+async def import_contacts(request: Request, contact_service: ContactService = Depends()):
+    """
+    Import contacts from a CSV (`text/csv`, with a header row) or NDJSON (`application/x-ndjson`) body.
+
+    The body is streamed and written in batches within one transaction; rows that fail validation
+    or duplicate an existing email are reported and skipped.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    parser = IMPORT_PARSERS.get(content_type)
+    if parser is None:
+        raise HTTPException(status_code=415, detail="Content type must be text/csv or application/x-ndjson")
+    try:
+        created, failed, errors = await contact_service.import_contacts(parser(request.stream()))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"created": created, "failed": failed, "errors": errors}
+
+
+@router.post("/batch-get", response_model=ContactBatch)
+async def batch_get_contacts(body: ContactIds, contact_service: ContactService = Depends()):
+    """Retrieve up to 500 contacts by id at once, in the requested order; unknown ids are listed as missing."""
+    contacts, missing = await contact_service.get_contacts_by_ids(body.ids)
+    return {"items": contacts, "missing": missing}
+
+
+@router.post("/bulk-update", response_model=ContactBulkResult)
+async def bulk_update_contacts(body: ContactBulkUpdate, contact_service: ContactService = Depends()):
+    """Apply the same changes (any fields but email) to up to 500 contacts, in one transaction."""
+    updated = await contact_service.update_contacts(body.ids, body.changes)
+    return {"count": len(updated), "ids": updated}
+
+
+@router.post("/bulk-delete", response_model=ContactBulkResult)
+async def bulk_delete_contacts(body: ContactIds, contact_service: ContactService = Depends()):
+    """Delete up to 500 contacts, in one transaction."""
+    deleted = await contact_service.delete_contacts(body.ids)
+    return {"count": len(deleted), "ids": deleted}
 
 
 @router.put("/{contact_id}", response_model=ContactResponse)
-def update_contact(contact_id: int, contact: ContactCreate,
-                   contact_service: ContactService = Depends()
+async def update_contact(contact_id: int, contact: ContactCreate,
+                         contact_service: ContactService = Depends()
 ):
-    updated_contact = contact_service.update_contact(contact_id, contact)
+    updated_contact = await contact_service.update_contact(contact_id, contact)
+    if not updated_contact:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return updated_contact
+
+
+@router.patch("/{contact_id}", response_model=ContactResponse)
+async def patch_contact(contact_id: int, changes: ContactUpdate,
+                        contact_service: ContactService = Depends()
+):
+    """Update only the fields present in the body."""
+    updated_contact = await contact_service.patch_contact(contact_id, changes)
     if not updated_contact:
         raise HTTPException(status_code=404, detail="Contact not found")
     return updated_contact
 
 
 @router.delete("/{contact_id}")
-def delete_contact(contact_id: int, contact_service: ContactService = Depends()):
-    deleted = contact_service.delete_contact(contact_id)
+async def delete_contact(contact_id: int, contact_service: ContactService = Depends()):
+    deleted = await contact_service.delete_contact(contact_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Contact not found")
     return {"detail": "Contact deleted"}
 
 
-@router.get("/search/", response_model=list[ContactResponse])
-def search_contacts(
+@router.get("/search/", response_model=ContactPage)
+async def search_contacts(
         name: str = Query(None),
         last_name: str = Query(None),
         email: str = Query(None),
+        q: str = Query(None, description="Search name, email and phone at once, best matches first"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str = Query(None),
+        fields: str = Query(None, description=FIELDS_DESCRIPTION),
         contact_service: ContactService = Depends()
 ):
-    contacts = contact_service.search_contacts(name, last_name, email)
+    fields = _parse_fields(fields)
+    try:
+        contacts, next_cursor = await contact_service.search_contacts(
+            limit, cursor, name, last_name, email, q, fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not contacts:
         raise HTTPException(status_code=404, detail="Contacts not found")
-    return contacts
+    return _page(contacts, next_cursor)
 
 
-@router.get("/birthdays/", response_model=list[ContactResponse])
-def get_upcoming_birthdays(
+@router.get("/birthdays/", response_model=ContactPage)
+async def get_upcoming_birthdays(
         days: int = DEFAULT_PERIOD,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: str = Query(None),
+        fields: str = Query(None, description=FIELDS_DESCRIPTION),
         contact_service: ContactService = Depends()
 ):
     if days < 1:
         raise HTTPException(status_code=400, detail="Period must be non-negative")
     if days > 365:
         raise HTTPException(status_code=400, detail="Period must be less than a year")
-    contacts = contact_service.get_upcoming_birthdays(
-        datetime.date.today(), datetime.date.today() + datetime.timedelta(days=days)
-    )
-    return contacts
+    fields = _parse_fields(fields)
+    try:
+        contacts, next_cursor = await contact_service.get_upcoming_birthdays(
+            datetime.date.today(), datetime.date.today() + datetime.timedelta(days=days), limit, cursor, fields
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _page(contacts, next_cursor)
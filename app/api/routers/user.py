@@ -1,37 +1,84 @@
 """
 User Routers
 """
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
 
 from app.api.schemas import UserResponse
+from app.config import Config
 from app.repository.models import User
 from app.services.authentication import get_current_user, get_current_admin_user
 from app.services.user_service import UserService
+from app.utils.avatars import AVATAR_SIZES, choose_avatar_size, is_avatar_filename, resolve_user_avatar
+from app.utils.etag import etag_matches, make_etag
 
 router = APIRouter(prefix="/user", tags=["User"])
-limiter = Limiter(key_func=get_remote_address)
+
+# content-addressed avatars never change, so they can be cached for good
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _avatar_response(request: Request, filename: str, stat_result: os.stat_result, cache_control: str) -> Response:
+    """Send an avatar variant, or 304 if the client's copy is current."""
+    headers = {"ETag": make_etag(filename.removesuffix(".webp"), weak=False), "Cache-Control": cache_control,
+               "Content-Location": f"{router.prefix}/avatars/{filename}"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if Config.AVATAR_ACCEL_REDIRECT:
+        # nginx sends the file (sendfile), the worker only names it
+        return Response(media_type="image/webp",
+                        headers={**headers, "X-Accel-Redirect": f"{Config.AVATAR_ACCEL_REDIRECT}/{filename}"})
+    return FileResponse(os.path.join(Config.AVATAR_DIR, filename), media_type="image/webp", headers=headers,
+                        stat_result=stat_result)
 
 
 @router.get(
-    "/me", response_model=UserResponse, description="No more than 10 requests per minute"
+    "/me", response_model=UserResponse, description="Rate limited per user, by default to 10 requests per minute (`RATE_LIMIT_ME`)"
 )
-@limiter.limit("10/minute")
-async def get_current_user(request: Request, user: User = Depends(get_current_user)):
+async def get_current_user(user: User = Depends(get_current_user)):
     """Retrieve the current user."""
     return user
 
 
 @router.put("/avatar", response_model=UserResponse)
-def update_avatar(
+async def update_avatar(
         avatar: UploadFile = File(...),
         current_user: User = Depends(get_current_admin_user),
         user_service: UserService = Depends()
 ):
     """Update the avatar of the current user."""
     try:
-        updated_user = user_service.update_avatar(current_user, avatar, avatar.filename)
+        updated_user = await user_service.update_avatar(current_user, avatar)
         return updated_user
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/avatars/{filename}", response_class=FileResponse)
+async def get_avatar_file(request: Request, filename: str):
+    """Get an avatar variant by its content-addressed name (see the `Content-Location` of a user's avatar)."""
+    if not is_avatar_filename(filename):
+        raise HTTPException(status_code=404, detail="Avatar not found")
+    try:
+        stat_result = await run_in_threadpool(os.stat, os.path.join(Config.AVATAR_DIR, filename))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Avatar not found")
+    return _avatar_response(request, filename, stat_result, IMMUTABLE)
+
+
+@router.get("/{user_id}/avatar", response_class=FileResponse)
+async def get_user_avatar(
+        request: Request,
+        user_id: int,
+        size: int = Query(max(AVATAR_SIZES), ge=1, description=f"Width in pixels; the smallest of {AVATAR_SIZES} "
+                                                                 f"at least as wide is sent"),
+):
+    """Get a user's avatar, resolved on disk without a database lookup."""
+    avatar = await run_in_threadpool(resolve_user_avatar, user_id, choose_avatar_size(size))
+    if avatar is None:
+        raise HTTPException(status_code=404, detail="Avatar not found")
+    # the avatar may change, so clients must revalidate it (cheaply, with If-None-Match)
+    return _avatar_response(request, *avatar, "public, no-cache")
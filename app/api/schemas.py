@@ -4,7 +4,9 @@ Contact and User Schemas.
 from datetime import date
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, field_validator
+
+MAX_BATCH_SIZE = 500  # ids per batch request
 
 
 class ContactBase(BaseModel):
@@ -18,6 +20,22 @@ class ContactBase(BaseModel):
 class ContactCreate(ContactBase):
     pass
 
+class ContactUpdate(BaseModel):
+    """Changes to a contact; fields that are not sent are left as they are."""
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    phone: Optional[str] = None
+    birthday: Optional[date] = None
+    additional_info: Optional[str] = None
+
+    @field_validator("first_name", "last_name", "email", "phone", "birthday")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("may be omitted, but not null")
+        return value
+
 class ContactResponse(ContactBase):
     id: int
 
@@ -25,6 +43,56 @@ class ContactResponse(ContactBase):
         from_attributes = True
 
 
+class ContactPage(BaseModel):
+    items: list[ContactResponse]
+    next_cursor: Optional[str] = None
+
+
+class ContactIds(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class ContactBulkUpdate(ContactIds):
+    changes: ContactUpdate
+
+    @field_validator("changes")
+    @classmethod
+    def settable_in_bulk(cls, changes: ContactUpdate):
+        if not changes.model_fields_set:
+            raise ValueError("at least one field must be changed")
+        if "email" in changes.model_fields_set:
+            raise ValueError("emails are unique, so they can't be set on several contacts")
+        return changes
+
+
+class ContactBulkResult(BaseModel):
+    count: int
+    ids: list[int]
+
+
+class ContactBatch(BaseModel):
+    items: list[ContactResponse]
+    missing: list[int]
+
+
+class ContactChanges(BaseModel):
+    changed: list[ContactResponse]
+    deleted: list[int]
+    next_token: str
+    has_more: bool
+
+
+class ContactImportError(BaseModel):
+    row: int
+    error: str
+
+
+class ContactImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: list[ContactImportError]
+
+
 class UserBase(BaseModel):
     email: EmailStr
 
@@ -1,13 +1,34 @@
 import os
 
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import ArgumentError
 
 load_dotenv()
 
 
+def async_database_url(database_url: str | None) -> str | None:
+    """The asyncpg URL of a PostgreSQL database URL, whatever its driver; None for other databases."""
+    try:
+        url = make_url(database_url or "")
+    except ArgumentError:
+        return None
+    if url.get_backend_name() != "postgresql":
+        return None
+    return url.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
 class Config:
     # Database Configuration
     DATABASE_URL = os.getenv("DATABASE_URL")
+    # asyncpg-backed URL for the async engine, derived from DATABASE_URL unless set explicitly
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # seconds before a connection is replaced
+    # test connections on checkout (one extra round trip), to survive database restarts
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
 
     # Application URL
     APP_BASE_URL = os.getenv("APP_BASE_URL")
@@ -16,6 +37,11 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
+    JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", 10000))  # verified tokens kept per worker
+
+    # Password hashing: bcrypt cost factor and size of the hashing thread pool
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
 
     # Mail Configuration
     MAIL_USERNAME = os.getenv("MAIL_USERNAME")
@@ -23,6 +49,14 @@ class Config:
     MAIL_FROM = os.getenv("MAIL_FROM")
     MAIL_PORT = os.getenv("MAIL_PORT")
     MAIL_SERVER = os.getenv("MAIL_SERVER")
+    MAIL_FROM_NAME = os.getenv("MAIL_FROM_NAME", "Contacts App")
+    MAIL_STARTTLS = os.getenv("MAIL_STARTTLS", "true").lower() in ("1", "true", "yes")
+
+    # Mail worker: name (keys its list of in-flight messages), messages sent per batch, and retries
+    MAIL_WORKER_NAME = os.getenv("MAIL_WORKER_NAME", "mail-worker")
+    MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", 50))
+    MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", 5))
+    MAIL_RETRY_DELAY = float(os.getenv("MAIL_RETRY_DELAY", 30))  # seconds, doubled after each failed attempt
 
     # Redis
     REDIS_HOST = "redis-container"
@@ -30,12 +64,41 @@ class Config:
     REDIS_DB = 0
     REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
 
+    # Per-process cache of authenticated users, in front of Redis
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 1024))
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))  # seconds
+
+    # Lifetime of cached contact responses
+    CONTACT_CACHE_TTL = int(os.getenv("CONTACT_CACHE_TTL", 300))  # seconds
+
+    # Response compression
+    COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))  # bytes
+    GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))  # 1-9
+    BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))  # 0-11
+
+    # Avatars: directory of the stored images, largest upload, and processes resizing the uploads
+    AVATAR_DIR = os.getenv("AVATAR_DIR", "avatars")
+    AVATAR_MAX_SIZE = int(os.getenv("AVATAR_MAX_SIZE", 5 * 1024 * 1024))  # bytes
+    AVATAR_WORKERS = int(os.getenv("AVATAR_WORKERS", 2))
+    # Internal nginx location of AVATAR_DIR; when set, avatars are sent by nginx (X-Accel-Redirect)
+    AVATAR_ACCEL_REDIRECT = os.getenv("AVATAR_ACCEL_REDIRECT")
+
+    # Rate limits, as "<requests>/<second|minute|hour|day>", enforced across workers through Redis
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+    RATE_LIMIT_DEFAULT = os.getenv("RATE_LIMIT_DEFAULT", "600/minute")  # any request, per user (or IP)
+    RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "10/minute")  # per IP
+    RATE_LIMIT_REGISTER = os.getenv("RATE_LIMIT_REGISTER", "10/hour")  # per IP
+    RATE_LIMIT_MAIL = os.getenv("RATE_LIMIT_MAIL", "5/hour")  # requests sending an email, per IP
+    RATE_LIMIT_ME = os.getenv("RATE_LIMIT_ME", "10/minute")  # GET /user/me, per user
+
     @staticmethod
     def validate():
         """Ensure that all required environment variables are set."""
         # Validate database config
         if not Config.DATABASE_URL:
             raise ValueError("DATABASE_URL is not set in the environment variables")
+        if not Config.ASYNC_DATABASE_URL:
+            raise ValueError("DATABASE_URL is not a PostgreSQL URL; set ASYNC_DATABASE_URL to an async driver URL")
         if not Config.SECRET_KEY:
             raise ValueError("SECRET_KEY is not set in the environment variables")
 
@@ -3,36 +3,78 @@ Main module for the FastAPI application.
 
 Includes routers for authentication, contacts, and user management.
 """
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.routers import contacts, auth, user
-from redis import asyncio as aioredis
 from app.config import Config
+from app.repository.database import async_engine
+from app.repository.pool import pool_metrics
+from app.services import contact_cache, user_cache
+from app.services.authentication import get_current_admin_user
+from app.services.user_cache import listen_for_invalidations
+from app.utils.cache import redis_client
+from app.utils.compression import CompressionMiddleware
+from app.utils.rate_limit import RateLimit, RateLimitMiddleware, rate_limit_stats
+from app.utils.upload_limit import MULTIPART_OVERHEAD, BodyLimit, BodySizeLimitMiddleware
 
-# Global Redis client
-redis_client = aioredis.from_url(Config.REDIS_URL, decode_responses=True)
-
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 @app.on_event("startup")
 async def startup_event():
     await redis_client.ping()
     print("Connected to Redis!")
+    # keep the per-worker user cache consistent with the other workers
+    app.state.user_cache_listener = asyncio.create_task(listen_for_invalidations())
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    app.state.user_cache_listener.cancel()
     await redis_client.close()
     print("Disconnected from Redis!")
+    await async_engine.dispose()
 
 # for now allow all origins
 allowed_origins = ["*"]
 
+# A request counts against every matching rule
+rate_limits = [
+    RateLimit("default", Config.RATE_LIMIT_DEFAULT),
+    RateLimit("login", Config.RATE_LIMIT_LOGIN, "/auth/login", "POST", per_user=False),
+    RateLimit("register", Config.RATE_LIMIT_REGISTER, "/auth/register", "POST", per_user=False),
+    RateLimit("verification-email", Config.RATE_LIMIT_MAIL, "/auth/send-verification-email", "POST", per_user=False),
+    RateLimit("password-reset", Config.RATE_LIMIT_MAIL, "/auth/request-password-reset", "POST", per_user=False),
+    RateLimit("me", Config.RATE_LIMIT_ME, "/user/me", "GET"),
+]
+
+# Uploads larger than these are rejected before their body is received and parsed
+body_limits = [
+    BodyLimit("/user/avatar", "PUT", Config.AVATAR_MAX_SIZE + MULTIPART_OVERHEAD),
+]
+
 # Healthcheck
 @app.get("/")
 async def root():
     return {"message": "Welcome to FastAPI!"}
 
 
+# Per-worker metrics, for sizing the connection pool and the caches, and tuning the rate limits; admins only
+@app.get("/metrics", dependencies=[Depends(get_current_admin_user)])
+async def metrics():
+    return {
+        "db_pool": pool_metrics(async_engine.pool),
+        "user_cache": dict(user_cache.cache_stats),
+        "contact_cache": dict(contact_cache.cache_stats),
+        "rate_limit": dict(rate_limit_stats),
+    }
+
+
+app.add_middleware(BodySizeLimitMiddleware, limits=body_limits)
+if Config.RATE_LIMIT_ENABLED:
+    # innermost, so rejected requests still get the CORS headers
+    app.add_middleware(RateLimitMiddleware, rules=rate_limits)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -40,6 +82,12 @@ app.add_middleware(
     allow_methods=["*"],  # all methods allowed
     allow_headers=["*"],  # all HTTP headers allowed
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=Config.COMPRESSION_MIN_SIZE,
+    gzip_level=Config.GZIP_LEVEL,
+    brotli_quality=Config.BROTLI_QUALITY,
+)
 
 # Include routers
 app.include_router(auth.router)
@@ -2,17 +2,32 @@
 Database connection and session management.
 """
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.config import Config
+from app.repository.pool import InstrumentedAsyncPool
 
-engine = create_engine(Config.DATABASE_URL)
+POOL_OPTIONS = {
+    "pool_size": Config.DB_POOL_SIZE,
+    "max_overflow": Config.DB_MAX_OVERFLOW,
+    "pool_timeout": Config.DB_POOL_TIMEOUT,
+    "pool_recycle": Config.DB_POOL_RECYCLE,
+    "pool_pre_ping": Config.DB_POOL_PRE_PING,
+}
+
+engine = create_engine(Config.DATABASE_URL, **POOL_OPTIONS)
 Base = declarative_base()
 
+# Async engine used by the API endpoints, so requests don't block Starlette's threadpool;
+# its pool records checkout metrics (see app.repository.pool)
+async_engine = create_async_engine(Config.ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncPool, **POOL_OPTIONS)
+
 
 # Configure the session maker
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Dependency to get a database session
 def get_db():
@@ -22,3 +37,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get an async database session
+async def get_async_db():
+    """Get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
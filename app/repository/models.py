@@ -5,7 +5,9 @@ This module contains SQLAlchemy models for the database, including `User` and `C
 """
 from enum import Enum as PyEnum
 
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, Enum
+from sqlalchemy import (
+    Column, Integer, String, Boolean, Date, DateTime, ForeignKey, Enum, Computed, Index, cast, extract, func
+)
 from sqlalchemy.orm import relationship
 
 from app.repository.database import Base
@@ -31,7 +33,7 @@ class User(Base):
         email (str): Email address of the user.
         hashed_password (str): Encrypted password of the user.
         role (UserRole): Role of the user (user or admin).
-        avatar (str): Path to the user's avatar image.
+        avatar (str): Digest naming the variants of the user's avatar image (see `app.utils.avatars`).
         is_active (bool): Indicates if the user account is active.
         is_verified (bool): Indicates if the user's email is verified.
         verification_token (str): Token used for email verification.
@@ -42,7 +44,7 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     role = Column(Enum(UserRole), default=UserRole.USER, nullable=False)
-    avatar = Column(String, nullable=True)  # Path to avatar image
+    avatar = Column(String, nullable=True)  # SHA-256 of the uploaded image
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
     verification_token = Column(String, nullable=True)
@@ -61,18 +63,60 @@ class Contact(Base):
         email (str): Email address of the contact.
         phone (str): Phone number of the contact.
         birthday (date): Birthday of the contact.
+        birthday_ordinal (int): Month and day of the birthday as MMDD, computed by the database.
         additional_info (str): Any additional information about the contact.
         owner_id (int): Foreign key referencing the user's ID.
+        updated_at (datetime): When the contact was created or last changed.
     """
     __tablename__ = "contacts"
 
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String, nullable=False, index=True)
     last_name = Column(String, nullable=False, index=True)
-    email = Column(String, nullable=False, unique=True, index=True)
+    email = Column(String, nullable=False)  # unique per owner, see uq_contacts_owner_id_email
     phone = Column(String, nullable=False)
     birthday = Column(Date, nullable=False)
+    # Stored month-day ordinal (e.g. 1231 for Dec 31) so upcoming birthdays can be found with an index range scan
+    birthday_ordinal = Column(
+        Integer, Computed(cast(extract("month", birthday) * 100 + extract("day", birthday), Integer), persisted=True)
+    )
     additional_info = Column(String, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # Link to the User table
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     owner = relationship("User", back_populates="contacts")
+
+    __table_args__ = (
+        # every query is scoped to an owner, so owner_id leads all the indexes
+        Index("ix_contacts_owner_id_id", "owner_id", "id"),
+        Index("ix_contacts_owner_id_last_name_first_name", "owner_id", "last_name", "first_name"),
+        Index("uq_contacts_owner_id_email", "owner_id", "email", unique=True),
+        Index("ix_contacts_owner_id_birthday_ordinal", "owner_id", "birthday_ordinal"),
+        Index("ix_contacts_owner_id_updated_at", "owner_id", "updated_at", "id"),
+        # pg_trgm GIN indexes serve substring (ILIKE '%...%') and similarity searches
+        *(
+            Index(f"ix_contacts_{column}_trgm", column,
+                  postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"})
+            for column in ("first_name", "last_name", "email", "phone")
+        ),
+    )
+
+
+class DeletedContact(Base):
+    """
+    Tombstone of a deleted contact, so clients syncing changes learn about the deletion.
+
+    Attributes:
+        id (int): Identifier the contact had.
+        owner_id (int): Foreign key referencing the ID of the user who owned the contact.
+        deleted_at (datetime): When the contact was deleted.
+    """
+    __tablename__ = "deleted_contacts"
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_deleted_contacts_owner_id_deleted_at", "owner_id", "deleted_at"),
+    )
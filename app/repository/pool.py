@@ -0,0 +1,48 @@
+"""
+Connection Pool Instrumentation.
+
+The API's connection pool records how connections are checked out, so the pool can be sized
+against real traffic: checkouts, time spent acquiring a connection, checkouts beyond `pool_size`
+(overflow) and checkouts that timed out waiting for a connection.
+"""
+import time
+from collections import Counter
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+# Per-process pool statistics: checkouts, overflow_checkouts, timeouts, wait_seconds, max_wait_seconds
+pool_stats = Counter()
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """`AsyncAdaptedQueuePool` recording its checkouts in `pool_stats`."""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            pool_stats["timeouts"] += 1
+            raise
+        finally:
+            # includes opening a new connection (and the pre-ping), i.e. everything a request waits for
+            waited = time.perf_counter() - start
+            pool_stats["wait_seconds"] += waited
+            pool_stats["max_wait_seconds"] = max(pool_stats["max_wait_seconds"], waited)
+        pool_stats["checkouts"] += 1
+        if self.checkedout() > self.size():
+            pool_stats["overflow_checkouts"] += 1
+        return connection
+
+
+def pool_metrics(pool: Pool) -> dict:
+    """Current state of a queue pool together with the recorded `pool_stats`."""
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        **pool_stats,
+        "avg_wait_seconds": pool_stats["wait_seconds"] / pool_stats["checkouts"] if pool_stats["checkouts"] else 0.0,
+    }
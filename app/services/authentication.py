@@ -10,71 +10,46 @@ from app.repository.models import UserRole
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 import logging
-from app.main import redis_client
+from app.services.user_cache import cache_user, get_cached_user
 from app.services.user_service import UserService
 from app.utils.jwt import verify_access_token
 from app.repository.models import User
-import json
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def get_current_user(token: str = Depends(oauth2_scheme), user_service: UserService = Depends()):
+async def get_current_user(token: str = Depends(oauth2_scheme), user_service: UserService = Depends()):
     """
     Get the current user from the token.
 
+    The user is served from the Redis cache when possible and loaded from the database otherwise.
+
     Args:
         token (str, optional): The authentication token. Defaults to Depends(oauth2_scheme).
         user_service (UserService, optional): The user service. Defaults to Depends().
 
     Raises:
-        HTTPException: If the token is invalid or expired.
+        HTTPException: If the token is invalid or expired, or the user is not verified.
 
     Returns:
-        User: The current user.
+        User: The current user. A cached user is detached from any database session.
     """
     email = verify_access_token(token)
     if not email:
         logger.error("Invalid or expired token")
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    cache_key = f"user:{email}"
-
-    # Check Redis cache
-    user_data = None
-    try:
-        cached_user = redis_client.get(cache_key)
-        if cached_user:
-            logger.info(f"Cache hit for user: {email}")
-            user_data = json.loads(cached_user)
-        else:
-            logger.info(f"Cache miss for user: {email}")
-    except Exception as e:
-        logger.error(f"Redis connection error: {str(e)}")
+    user = await get_cached_user(email)
 
     # Fetch user from database if not in cache
-    if not user_data:
-        user = user_service.get_user_by_email(email=email)
+    if user is None:
+        user = await user_service.get_user_by_email(email=email)
         if not user or not user.is_verified:
             logger.warning(f"User not verified or does not exist: {email}")
             raise HTTPException(status_code=403, detail="User is not verified")
+        await cache_user(user)
 
-        # Cache user data in Redis
-        user_data = {
-            "id": user.id,
-            "email": user.email,
-            "is_verified": user.is_verified,
-            "is_active": user.is_active,
-            "avatar": user.avatar,
-            "role": user.role
-        }
-        try:
-            redis_client.set(cache_key, json.dumps(user_data), ex=3600)  # Cache for 1 hour
-            logger.info(f"User data cached for {email}")
-        except Exception as e:
-            logger.error(f"Failed to cache user data for {email}: {str(e)}")
-
-    return user_data
+    return user
 
 def get_current_admin_user(current_user: User = Depends(get_current_user)):
     """
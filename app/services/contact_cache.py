@@ -0,0 +1,107 @@
+"""
+Contact Cache.
+
+This module caches serialised contact responses in Redis, per owner. Each owner has a version counter
+that `ContactService` bumps whenever one of their contacts changes. Responses are cached under the
+version they were built from, so a bump makes all of the owner's cached responses unreachable at once
+(they expire on their own).
+"""
+import logging
+import time
+from collections import Counter
+from typing import Awaitable, Callable
+
+from app.config import Config
+from app.utils.cache import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Per-process cache statistics: hits, misses and Redis errors
+cache_stats = Counter()
+
+
+def _version_key(owner_id: int) -> str:
+    return f"contacts:{owner_id}:version"
+
+
+async def get_version(owner_id: int) -> int:
+    """
+    Get the current version of an owner's contacts.
+
+    Raises:
+        redis.RedisError: If Redis is unavailable.
+    """
+    key = _version_key(owner_id)
+    version = await redis_client.get(key)
+    if version is None:
+        # start from the clock rather than 0, so a lost counter never revisits the versions of old responses
+        await redis_client.set(key, time.time_ns(), nx=True)
+        version = await redis_client.get(key)
+    return int(version)
+
+
+async def bump_version(owner_id: int) -> None:
+    """Mark all cached responses of an owner as outdated."""
+    key = _version_key(owner_id)
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.set(key, time.time_ns(), nx=True)
+            pipe.incr(key)
+            await pipe.execute()
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.error(f"Failed to bump contacts version of owner {owner_id}: {str(e)}")
+
+
+async def current_version(owner_id: int) -> int | None:
+    """Get the current version of an owner's contacts, or None if Redis is unavailable."""
+    try:
+        return await get_version(owner_id)
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.error(f"Redis connection error: {str(e)}")
+        return None
+
+
+async def get_or_build(owner_id: int, key: str, build: Callable[[], Awaitable[str | None]],
+                       version: int | None = None) -> str | None:
+    """
+    Get a cached response of an owner, building and caching it on a miss.
+
+    Args:
+        owner_id (int): Owner of the contacts in the response.
+        key (str): Identifies the response among the owner's responses.
+        build (Callable): Builds the serialised response from the database; None results are not cached.
+        version (int, optional): Version of the owner's contacts, if already read (e.g. for an ETag).
+
+    Returns:
+        str | None: The serialised response.
+    """
+    # read the version before the database, so a response built from data changed meanwhile
+    # is stored under the outdated version
+    if version is None:
+        version = await current_version(owner_id)
+        if version is None:
+            return await build()
+
+    response_key = f"contacts:{owner_id}:{version}:{key}"
+    try:
+        cached = await redis_client.get(response_key)
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.error(f"Redis connection error: {str(e)}")
+        return await build()
+
+    if cached is not None:
+        cache_stats["hits"] += 1
+        return cached
+
+    cache_stats["misses"] += 1
+    response = await build()
+    if response is not None:
+        try:
+            await redis_client.set(response_key, response, ex=Config.CONTACT_CACHE_TTL)
+        except Exception as e:
+            cache_stats["errors"] += 1
+            logger.error(f"Failed to cache contacts response {response_key}: {str(e)}")
+    return response
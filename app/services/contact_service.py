@@ -3,16 +3,36 @@ Contact Service.
 
 This module contains the `ContactService` class, which provides functionality for managing user contacts.
 """
-from datetime import date
+import calendar
+from datetime import date, timedelta
+
+from typing import AsyncIterator
 
 from fastapi import Depends
-from sqlalchemy.orm import Session
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import ARRAY, Integer, any_, bindparam, case, delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.schemas import ContactCreate
-from app.repository.database import get_db
-from app.repository.models import Contact, User
+from app.api.schemas import ContactCreate, ContactResponse, ContactUpdate
+from app.repository.database import AsyncSessionLocal, get_async_db
+from app.repository.models import Contact, DeletedContact, User
+from app.services import contact_cache
 # we import get_current_user here because all contacts are meant to be fetched for the current user
 from app.services.authentication import get_current_user
+from app.utils.contact_export import EXPORT_FIELDS
+from app.utils.contact_import import ParsedRow
+from app.utils.pagination import decode_cursor, decode_sync_token, encode_cursor, encode_sync_token
+
+LEAP_DAY = 229  # Feb 29 as a birthday ordinal
+IMPORT_BATCH_SIZE = 500  # rows per multi-row INSERT
+MAX_REPORTED_ERRORS = 1000
+EXPORT_BATCH_SIZE = 1000  # rows fetched per round trip from the server-side cursor
+# updated_at is the start time of the writing transaction, so a change may become visible after
+# changes with later timestamps; sync tokens look back this far to catch such late commits
+SYNC_OVERLAP = timedelta(seconds=60)
+CONTACT_FIELDS = tuple(ContactResponse.model_fields)  # fields a listing can be projected to
 
 
 class ContactService:
@@ -20,73 +40,442 @@ class ContactService:
     A service class for managing contacts.
 
     Attributes:
-        db (Session): Database session for queries.
+        db (AsyncSession): Database session for queries.
         user (User): Currently authenticated user.
     """
-    def __init__(self, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    def __init__(self, db: AsyncSession = Depends(get_async_db), user: User = Depends(get_current_user)):
         self.db = db
         self.user = user
 
-    def get_all_contacts(self):
+    async def get_all_contacts(self, limit: int, cursor: str | None = None, fields: list[str] | None = None):
         """
-        Retrieve all contacts for the current user.
+        Retrieve a page of contacts for the current user.
+
+        Args:
+            limit (int): Maximum number of contacts in the page.
+            cursor (str, optional): Cursor of the page to fetch, as returned with the previous page.
+            fields (List[str], optional): Only read these fields (and the id), returning rows instead of contacts.
 
         Returns:
-            List[Contact]: List of all contacts.
+            tuple[List[Contact], str | None]: Contacts of the page and the cursor of the next page, if any.
+
+        Raises:
+            ValueError: If the cursor is malformed or a field is unknown.
+        """
+        fields = self._projection(fields)
+        return await self._paginate(self._get_contacts_for_user(fields), limit, cursor, fields)
+
+    async def get_contacts_version(self) -> int | None:
+        """
+        Get the version of the current user's contacts, which changes whenever any of them changes.
+
+        Returns:
+            int | None: The version, or None if it is unavailable (Redis is down).
+        """
+        return await contact_cache.current_version(self.user.id)
+
+    async def get_all_contacts_json(self, limit: int, cursor: str | None = None, version: int | None = None,
+                                    fields: list[str] | None = None) -> str:
+        """
+        Retrieve a page of contacts for the current user, serialised as a `ContactPage` JSON document
+        (with only the requested `fields`, if any).
+
+        Served from the contact cache when possible, which skips both the database and serialisation.
+        Pass `version` if it was already read with `get_contacts_version`.
         """
-        return self._get_contacts_for_user()
+        # always read rows rather than entities, for the fast serialisation of `page_json`
+        fields = self._projection(fields) or CONTACT_FIELDS
 
-    def get_contact_by_id(self, contact_id: int):
-        return self.db.query(Contact).filter(
-            Contact.id == contact_id,
-            Contact.owner_id == self.user.id
-        ).first()
+        async def build():
+            rows, next_cursor = await self.get_all_contacts(limit, cursor, fields)
+            return page_json(rows, next_cursor)
 
-    def create_contact(self, contact_data: ContactCreate):
+        key = f"list:{limit}:{cursor or ''}" + (f":{','.join(fields)}" if fields != CONTACT_FIELDS else "")
+        return await contact_cache.get_or_build(self.user.id, key, build, version)
+
+    async def get_contact_json(self, contact_id: int, version: int | None = None) -> str | None:
+        """Retrieve a contact serialised as a `ContactResponse` JSON document, or None if it doesn't exist."""
+        async def build():
+            contact = await self.get_contact_by_id(contact_id)
+            return ContactResponse.model_validate(contact).model_dump_json() if contact else None
+
+        return await contact_cache.get_or_build(self.user.id, f"contact:{contact_id}", build, version)
+
+    async def get_contact_by_id(self, contact_id: int):
+        result = await self.db.execute(
+            self._get_contacts_for_user().where(Contact.id == contact_id)
+        )
+        return result.scalars().first()
+
+    async def get_contacts_by_ids(self, ids: list[int]):
+        """
+        Retrieve many contacts of the current user with one query.
+
+        Args:
+            ids (List[int]): Ids of the contacts; repeated ids are returned once.
+
+        Returns:
+            tuple[List[Contact], List[int]]: Found contacts in the order of `ids`, and the ids that
+            don't exist or belong to another user.
+        """
+        ids = list(dict.fromkeys(ids))
+        result = await self.db.execute(self._get_contacts_for_user().where(self._id_in(ids)))
+        found = {contact.id: contact for contact in result.scalars().all()}
+        return [found[id] for id in ids if id in found], [id for id in ids if id not in found]
+
+    async def create_contact(self, contact_data: ContactCreate):
         new_contact = Contact(**contact_data.model_dump(), owner_id=self.user.id)
         self.db.add(new_contact)
-        self.db.commit()
-        self.db.refresh(new_contact)
+        await self.db.commit()
+        await contact_cache.bump_version(self.user.id)
+        await self.db.refresh(new_contact)
         return new_contact
 
-    def update_contact(self, contact_id: int, updated_data: ContactCreate):
-        contact = self.get_contact_by_id(contact_id)
+    async def update_contact(self, contact_id: int, updated_data: ContactCreate):
+        return await self._update_contact(contact_id, updated_data.model_dump())
+
+    async def patch_contact(self, contact_id: int, changes: ContactUpdate):
+        """
+        Change only the given fields of a contact.
+
+        Returns:
+            Contact | None: The updated contact, or None if it doesn't exist.
+        """
+        values = changes.model_dump(exclude_unset=True)
+        if not values:
+            return await self.get_contact_by_id(contact_id)
+        return await self._update_contact(contact_id, values)
+
+    async def _update_contact(self, contact_id: int, values: dict):
+        # a single UPDATE ... RETURNING instead of loading, changing and refreshing the contact
+        result = await self.db.execute(
+            update(Contact)
+            .where(Contact.id == contact_id, Contact.owner_id == self.user.id)
+            .values(**values)
+            .returning(Contact)
+        )
+        contact = result.scalars().first()
         if not contact:
             return None
-        for key, value in updated_data.model_dump().items():
-            setattr(contact, key, value)
-        self.db.commit()
-        self.db.refresh(contact)
+        await self.db.commit()
+        await contact_cache.bump_version(self.user.id)
         return contact
 
-    def delete_contact(self, contact_id: int):
-        contact = self.get_contact_by_id(contact_id)
-        if not contact:
-            return False
-        self.db.delete(contact)
-        self.db.commit()
-        return True
+    async def update_contacts(self, ids: list[int], changes: ContactUpdate) -> list[int]:
+        """
+        Apply the same changes to many contacts of the current user, with one UPDATE.
+
+        Returns:
+            List[int]: Ids of the updated contacts; the others don't exist or belong to another user.
+        """
+        result = await self.db.execute(
+            update(Contact)
+            .where(Contact.owner_id == self.user.id, self._id_in(ids))
+            .values(**changes.model_dump(exclude_unset=True))
+            .returning(Contact.id)
+        )
+        updated = sorted(result.scalars().all())
+        if updated:
+            await self.db.commit()
+            await contact_cache.bump_version(self.user.id)
+        return updated
+
+    async def delete_contact(self, contact_id: int):
+        return bool(await self._delete_where(Contact.id == contact_id))
+
+    async def delete_contacts(self, ids: list[int]) -> list[int]:
+        """
+        Delete many contacts of the current user, with one DELETE.
+
+        Returns:
+            List[int]: Ids of the deleted contacts; the others don't exist or belong to another user.
+        """
+        return await self._delete_where(self._id_in(ids))
+
+    async def _delete_where(self, condition) -> list[int]:
+        # delete the contacts and leave their tombstones in one statement
+        deleted = (
+            delete(Contact)
+            .where(Contact.owner_id == self.user.id, condition)
+            .returning(Contact.id, Contact.owner_id)
+            .cte("deleted")
+        )
+        result = await self.db.execute(
+            insert(DeletedContact)
+            .from_select(["id", "owner_id"], select(deleted.c.id, deleted.c.owner_id))
+            .returning(DeletedContact.id)
+        )
+        ids = sorted(result.scalars().all())
+        if ids:
+            await self.db.commit()
+            await contact_cache.bump_version(self.user.id)
+        return ids
+
+    async def get_changes(self, since: str | None, limit: int):
+        """
+        Retrieve the contacts created, updated or deleted since a sync token.
+
+        Changes are returned oldest first. Within the overlap window (`SYNC_OVERLAP`), a change may
+        be returned again by the next sync, so clients must apply them idempotently.
+
+        Args:
+            since (str, optional): Sync token returned by the previous sync; None for a full sync.
+            limit (int): Maximum number of changed contacts returned.
+
+        Returns:
+            tuple[List[Contact], List[int], str, bool]: Changed contacts, ids of deleted contacts,
+            the token to sync from next, and whether more changes are waiting.
+
+        Raises:
+            ValueError: If the sync token is malformed.
+        """
+        # transaction start time: nothing committed later can carry an earlier timestamp
+        # than this, except changes from transactions still running (see SYNC_OVERLAP)
+        now = await self.db.scalar(select(func.now()))
+        changed_query = self._get_contacts_for_user().order_by(Contact.updated_at, Contact.id).limit(limit + 1)
+        deleted_query = select(DeletedContact.id).where(DeletedContact.owner_id == self.user.id)
+        if since is not None:
+            since_at, since_id = decode_sync_token(since)
+            changed_query = changed_query.where(tuple_(Contact.updated_at, Contact.id) > tuple_(since_at, since_id))
+            deleted_query = deleted_query.where(DeletedContact.deleted_at > since_at)
 
-    def search_contacts(self, name: str = None, last_name: str = None, email: str = None):
-        query = self._get_contacts_for_user()
+        changed = list((await self.db.execute(changed_query)).scalars().all())
+        has_more = len(changed) > limit
+        if has_more:
+            changed = changed[:limit]
+            last = changed[-1]
+            next_token = encode_sync_token(last.updated_at, last.id)
+            deleted_query = deleted_query.where(DeletedContact.deleted_at <= last.updated_at)
+        else:
+            next_token = encode_sync_token(now - SYNC_OVERLAP, 0)
+
+        # a full sync only returns live contacts, so there is nothing to delete on the client
+        deleted = []
+        if since is not None:
+            deleted = list((await self.db.execute(deleted_query.order_by(DeletedContact.deleted_at))).scalars().all())
+        return changed, deleted, next_token, has_more
+
+    async def import_contacts(self, rows: AsyncIterator[ParsedRow], batch_size: int = IMPORT_BATCH_SIZE):
+        """
+        Import contacts in bulk, within a single transaction.
+
+        Rows are validated against `ContactCreate` and written with one multi-row INSERT per batch.
+        Invalid rows and rows whose email already exists are skipped and reported, without aborting the import.
+
+        Args:
+            rows (AsyncIterator[ParsedRow]): Parsed rows, as produced by `app.utils.contact_import`.
+            batch_size (int): Number of valid rows written per INSERT.
+
+        Returns:
+            tuple[int, int, list[dict]]: Number of created contacts, number of failed rows and
+            the errors of the first `MAX_REPORTED_ERRORS` failed rows.
+        """
+        created, failed, errors = 0, 0, []
+
+        def report(row_number: int, error: str):
+            nonlocal failed
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": row_number, "error": error})
+
+        batch = []
+        try:
+            async for row_number, data, error in rows:
+                if error is not None:
+                    report(row_number, error)
+                    continue
+                try:
+                    batch.append((row_number, ContactCreate.model_validate(data)))
+                except ValidationError as e:
+                    report(row_number, "; ".join(
+                        f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+                    ))
+                if len(batch) >= batch_size:
+                    created += await self._insert_batch(batch, report)
+                    batch = []
+            if batch:
+                created += await self._insert_batch(batch, report)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        if created:
+            await contact_cache.bump_version(self.user.id)
+        return created, failed, errors
+
+    async def _insert_batch(self, batch: list[tuple[int, ContactCreate]], report) -> int:
+        """Insert a batch of contacts with a single statement, reporting rows skipped as duplicates."""
+        statement = (
+            pg_insert(Contact)
+            .values([{**contact.model_dump(), "owner_id": self.user.id} for _, contact in batch])
+            .on_conflict_do_nothing(index_elements=[Contact.owner_id, Contact.email])
+            .returning(Contact.email)
+        )
+        result = await self.db.execute(statement)
+        inserted = set(result.scalars().all())
+        created = 0
+        for row_number, contact in batch:
+            # an email repeated within the batch is only inserted once, for its first row
+            if contact.email in inserted:
+                inserted.remove(contact.email)
+                created += 1
+            else:
+                report(row_number, "A contact with this email already exists")
+        return created
+
+    async def export_contacts(self):
+        """
+        Stream all contacts of the current user, in id order.
+
+        Rows are read through a server-side cursor in batches, so memory use doesn't depend on the
+        size of the address book. Meant to feed a `StreamingResponse`: it outlives the request's
+        dependencies, so it reads through a session of its own.
+
+        Yields:
+            Mapping: Contact fields listed in `EXPORT_FIELDS`.
+        """
+        query = (
+            select(*(getattr(Contact, field) for field in EXPORT_FIELDS))
+            .where(Contact.owner_id == self.user.id)
+            .order_by(Contact.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(query)
+            async for row in result.mappings():
+                yield row
+
+    async def search_contacts(self, limit: int, cursor: str | None = None,
+                              name: str = None, last_name: str = None, email: str = None, q: str = None,
+                              fields: list[str] | None = None):
+        """
+        Search contacts of the current user.
+
+        `name`, `last_name` and `email` filter by substring of the respective field. `q` searches
+        name, email and phone at once and ranks the matches by relevance; ranked results are not
+        paginated, only the best `limit` matches are returned. `fields` works as in `get_all_contacts`.
+
+        Returns:
+            tuple[List[Contact], str | None]: Matching contacts and the cursor of the next page, if any.
+        """
+        fields = self._projection(fields)
+        query = self._get_contacts_for_user(fields)
         if name:
-            query = query.filter(Contact.first_name.ilike(f"%{name}%"))
+            query = query.where(Contact.first_name.ilike(f"%{name}%"))
         if last_name:
-            query = query.filter(Contact.last_name.ilike(f"%{last_name}%"))
+            query = query.where(Contact.last_name.ilike(f"%{last_name}%"))
         if email:
-            query = query.filter(Contact.email.ilike(f"%{email}%"))
-        return query.all()
-
-    def get_upcoming_birthdays(self, start_date: date, end_date: date):
-        upcoming_birthdays = []
-        contacts = self._get_contacts_for_user()
-        for contact in contacts:
-            this_year_birthday = date(start_date.year, contact.birthday.month, contact.birthday.day)
-            if this_year_birthday < start_date:
-                this_year_birthday = date(start_date.year + 1, contact.birthday.month, contact.birthday.day)
-            if start_date <= this_year_birthday <= end_date:
-                upcoming_birthdays.append(contact)
-        return upcoming_birthdays
-
-    def _get_contacts_for_user(self):
-        return self.db.query(Contact).filter(Contact.owner_id == self.user.id)
+            query = query.where(Contact.email.ilike(f"%{email}%"))
+        if q:
+            condition, score = self._match_any_field(q, self.db.get_bind().dialect.name)
+            result = await self.db.execute(query.where(condition).order_by(score.desc(), Contact.id).limit(limit))
+            return self._rows(result, fields), None
+        return await self._paginate(query, limit, cursor, fields)
+
+    async def get_upcoming_birthdays(self, start_date: date, end_date: date, limit: int, cursor: str | None = None,
+                                     fields: list[str] | None = None):
+        fields = self._projection(fields)
+        query = self._get_contacts_for_user(fields).where(self._birthday_between(start_date, end_date))
+        return await self._paginate(query, limit, cursor, fields)
+
+    def _get_contacts_for_user(self, fields: tuple[str, ...] | None = None):
+        # a projection selects plain columns, so the rows skip ORM entity construction
+        columns = (Contact,) if fields is None else [getattr(Contact, field) for field in fields]
+        return select(*columns).where(Contact.owner_id == self.user.id)
+
+    async def _paginate(self, query, limit: int, cursor: str | None, fields: tuple[str, ...] | None = None):
+        """Fetch one keyset page of `query`, ordered by contact id."""
+        query = self._after_cursor(query, cursor).order_by(Contact.id).limit(limit + 1)
+        result = await self.db.execute(query)
+        return self._to_page(self._rows(result, fields), limit)
+
+    @staticmethod
+    def _projection(fields: list[str] | tuple[str, ...] | None) -> tuple[str, ...] | None:
+        """
+        Validate requested fields, returning them in a canonical order (for cache keys), with the id.
+
+        Raises:
+            ValueError: If a field is unknown.
+        """
+        if not fields:
+            return None
+        unknown = set(fields) - set(CONTACT_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        # the id is always included, as page cursors are built from it
+        return tuple(field for field in CONTACT_FIELDS if field == "id" or field in fields)
+
+    @staticmethod
+    def _rows(result, fields: tuple[str, ...] | None):
+        return result.all() if fields else result.scalars().all()
+
+    @staticmethod
+    def _match_any_field(q: str, dialect: str):
+        """
+        Build the condition and relevance score of a search for `q` across name, email and phone.
+
+        On PostgreSQL this uses trigram word similarity, served by the pg_trgm GIN indexes.
+        Other databases (SQLite in tests) fall back to substring matching.
+        """
+        fields = (Contact.first_name, Contact.last_name, Contact.email, Contact.phone)
+        pattern = f"%{q}%"
+        if dialect == "postgresql":
+            # `field %> q` is true when q is similar to a word of the field (pg_trgm.word_similarity_threshold)
+            condition = or_(*(or_(field.ilike(pattern), field.op("%>")(q)) for field in fields))
+            score = func.greatest(*(func.word_similarity(q, field) for field in fields))
+        else:
+            condition = or_(*(field.ilike(pattern) for field in fields))
+            score = sum(case((field.ilike(pattern), 1), else_=0) for field in fields)
+        return condition, score
+
+    @staticmethod
+    def _birthday_between(start_date: date, end_date: date):
+        """
+        Build a condition matching contacts whose birthday falls between `start_date` and `end_date`.
+
+        Birthdays are compared by their month-day ordinal, so the query is served by the
+        (owner_id, birthday_ordinal) index. The period may span at most a year.
+        """
+        start = start_date.month * 100 + start_date.day
+        end = end_date.month * 100 + end_date.day
+        if start_date.year == end_date.year:
+            condition = Contact.birthday_ordinal.between(start, end)
+        else:
+            # the period wraps around New Year
+            condition = or_(Contact.birthday_ordinal >= start, Contact.birthday_ordinal <= end)
+
+        # Feb 29 birthdays are celebrated on Feb 28 in non-leap years
+        if any(
+            not calendar.isleap(year) and start_date <= date(year, 2, 28) <= end_date
+            for year in range(start_date.year, end_date.year + 1)
+        ):
+            condition = or_(condition, Contact.birthday_ordinal == LEAP_DAY)
+        return condition
+
+    @staticmethod
+    def _id_in(ids: list[int]):
+        # `= ANY(array)` sends all ids as one parameter, unlike an IN list
+        return Contact.id == any_(bindparam("ids", list(ids), type_=ARRAY(Integer)))
+
+    @staticmethod
+    def _after_cursor(query, cursor: str | None):
+        if cursor:
+            query = query.where(Contact.id > decode_cursor(cursor))
+        return query
+
+    @staticmethod
+    def _to_page(contacts, limit: int):
+        # one extra row was fetched to find out whether there is a next page
+        if len(contacts) > limit:
+            contacts = contacts[:limit]
+            return contacts, encode_cursor(contacts[-1].id)
+        return contacts, None
+
+
+def page_json(rows, next_cursor: str | None) -> str:
+    """
+    Serialise a page of rows, as read with `fields`, as a `ContactPage` JSON document.
+
+    The rows are serialised as they are with orjson, skipping the per-row validation of `ContactPage`.
+    """
+    return orjson.dumps({"items": [row._asdict() for row in rows], "next_cursor": next_cursor}).decode()
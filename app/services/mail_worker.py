@@ -0,0 +1,233 @@
+"""
+Mail Worker.
+
+Delivers the emails queued by `app.utils.mail`. It runs as a separate process:
+
+    python -m app.services.mail_worker
+
+The worker keeps one SMTP connection open and sends the queued messages over it in batches. While
+being sent, messages sit in a list of the worker's own, so those of a worker that dies are queued
+again when it restarts. Failed sends are retried with exponential backoff and, after
+`MAIL_MAX_ATTEMPTS` attempts, moved to the `mail:dead` list for inspection.
+"""
+import asyncio
+import json
+import logging
+import signal
+import time
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.config import Config
+from app.utils.cache import redis_client
+from app.utils.mail import MAIL_QUEUE_KEY, TEMPLATE_FOLDER
+
+logger = logging.getLogger(__name__)
+
+MAIL_RETRY_KEY = "mail:retry"  # failed messages, scored by the time they are due again
+MAIL_DEAD_KEY = "mail:dead"  # messages that failed MAIL_MAX_ATTEMPTS times
+POLL_TIMEOUT = 5  # seconds to wait for a message before checking the retries again
+IDLE_CHECK_INTERVAL = 60  # seconds idle after which the connection is checked (NOOP) before use
+
+# Moves the retries that are due back to the queue, atomically so two workers never both requeue one
+PROMOTE_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, message in ipairs(due) do
+    redis.call('ZREM', KEYS[1], message)
+    redis.call('LPUSH', KEYS[2], message)
+end
+return #due
+"""
+
+
+def processing_key(worker_name: str) -> str:
+    return f"mail:processing:{worker_name}"
+
+
+class TemplateRenderer:
+    """Renders the mail templates, all of which are compiled once, when the renderer is created."""
+    def __init__(self, folder: str = TEMPLATE_FOLDER):
+        environment = Environment(loader=FileSystemLoader(folder), autoescape=select_autoescape(["html"]))
+        self.templates = {name: environment.get_template(name) for name in environment.list_templates()}
+
+    def render(self, template_name: str, context: dict) -> str:
+        return self.templates[template_name].render(**context)
+
+
+class MailWorker:
+    """
+    Sends the queued emails over a single, reused SMTP connection.
+
+    Attributes:
+        name (str): Worker name; workers running at the same time need distinct names.
+        redis (Redis): Client of the Redis instance holding the queue.
+        batch_size (int): Most messages taken from the queue at once.
+        max_attempts (int): Attempts to send a message before giving up on it.
+        retry_delay (float): Seconds before the first retry; doubled for each further attempt.
+    """
+    def __init__(self, name: str = Config.MAIL_WORKER_NAME, redis: Redis = redis_client,
+                 hostname: str = Config.MAIL_SERVER, port: int = int(Config.MAIL_PORT),
+                 username: str | None = Config.MAIL_USERNAME, password: str | None = Config.MAIL_PASSWORD,
+                 start_tls: bool = Config.MAIL_STARTTLS, batch_size: int = Config.MAIL_BATCH_SIZE,
+                 max_attempts: int = Config.MAIL_MAX_ATTEMPTS, retry_delay: float = Config.MAIL_RETRY_DELAY):
+        self.name = name
+        self.redis = redis
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.renderer = TemplateRenderer()
+        self._promote_due = redis.register_script(PROMOTE_DUE_SCRIPT)
+        self._smtp: aiosmtplib.SMTP | None = None
+        self._last_used = 0.0
+
+    @property
+    def processing_key(self) -> str:
+        return processing_key(self.name)
+
+    async def run(self) -> None:
+        """Send queued messages until cancelled."""
+        requeued = await self.requeue_unfinished()
+        if requeued:
+            logger.info(f"Requeued {requeued} unfinished messages")
+        try:
+            while True:
+                try:
+                    await self.promote_due_retries()
+                    batch = await self.take_batch()
+                    if batch:
+                        await self.send_batch(batch)
+                except RedisError as e:
+                    logger.error(f"Mail queue unavailable: {str(e)}")
+                    await asyncio.sleep(POLL_TIMEOUT)
+        finally:
+            await self.close()
+
+    async def requeue_unfinished(self) -> int:
+        """Move the messages this worker was sending when it last stopped back to the queue."""
+        count = 0
+        while await self.redis.lmove(self.processing_key, MAIL_QUEUE_KEY, "RIGHT", "RIGHT") is not None:
+            count += 1
+        return count
+
+    async def promote_due_retries(self) -> int:
+        """Queue the failed messages whose retry is due."""
+        return await self._promote_due(keys=[MAIL_RETRY_KEY, MAIL_QUEUE_KEY], args=[time.time(), self.batch_size])
+
+    async def take_batch(self) -> list[str]:
+        """
+        Take up to `batch_size` messages from the queue, waiting up to `POLL_TIMEOUT` for the first.
+
+        The messages are moved to this worker's processing list until they are sent or rescheduled.
+        """
+        first = await self.redis.blmove(MAIL_QUEUE_KEY, self.processing_key, POLL_TIMEOUT, "RIGHT", "LEFT")
+        if first is None:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for _ in range(self.batch_size - 1):
+                pipe.lmove(MAIL_QUEUE_KEY, self.processing_key, "RIGHT", "LEFT")
+            rest = await pipe.execute()
+        return [first] + [raw for raw in rest if raw is not None]
+
+    async def send_batch(self, batch: list[str]) -> int:
+        """Send a batch of queued messages, rescheduling those that fail. Returns the number sent."""
+        sent = 0
+        for raw in batch:
+            try:
+                message = json.loads(raw)
+                email = self.build_email(message)
+            except (ValueError, KeyError) as e:
+                logger.error(f"Moving a malformed message to the dead letters: {str(e)}")
+                await self._reschedule(raw, None)
+                continue
+            try:
+                smtp = await self._connection()
+                await smtp.send_message(email)
+            except (aiosmtplib.SMTPException, OSError) as e:
+                logger.warning(f"Failed to send message {message['id']} "
+                               f"(attempt {message['attempts'] + 1}): {str(e)}")
+                if self._smtp is not None and not self._smtp.is_connected:
+                    self._smtp = None
+                await self._reschedule(raw, message)
+                continue
+            self._last_used = time.monotonic()
+            await self.redis.lrem(self.processing_key, 1, raw)
+            sent += 1
+        logger.info(f"Sent {sent} of {len(batch)} messages")
+        return sent
+
+    def build_email(self, message: dict) -> EmailMessage:
+        email = EmailMessage()
+        email["From"] = formataddr((Config.MAIL_FROM_NAME, Config.MAIL_FROM))
+        email["To"] = ", ".join(message["recipients"])
+        email["Subject"] = message["subject"]
+        # stable across retries, so a message sent twice can be recognised as a duplicate
+        email["Message-ID"] = f"<{message['id']}@{Config.MAIL_FROM.partition('@')[2] or 'localhost'}>"
+        email.set_content(self.renderer.render(message["template_name"], message["template_body"]), subtype="html")
+        return email
+
+    async def close(self) -> None:
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+        self._smtp = None
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        """The open SMTP connection, (re)connecting if the server has dropped it."""
+        if self._smtp is not None and self._smtp.is_connected:
+            if time.monotonic() - self._last_used < IDLE_CHECK_INTERVAL:
+                return self._smtp
+            try:
+                await self._smtp.noop()
+                return self._smtp
+            except (aiosmtplib.SMTPException, OSError):
+                self._smtp.close()
+        self._smtp = None
+        smtp = aiosmtplib.SMTP(hostname=self.hostname, port=self.port, start_tls=self.start_tls)
+        await smtp.connect()
+        if self.username:
+            await smtp.login(self.username, self.password)
+        self._smtp = smtp
+        self._last_used = time.monotonic()
+        return smtp
+
+    async def _reschedule(self, raw: str, message: dict | None) -> None:
+        """Schedule a retry of a failed message, or move it to the dead letters once out of attempts."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if message is None:
+                pipe.lpush(MAIL_DEAD_KEY, raw)
+            else:
+                attempts = message["attempts"] + 1
+                failed = json.dumps({**message, "attempts": attempts})
+                if attempts >= self.max_attempts:
+                    pipe.lpush(MAIL_DEAD_KEY, failed)
+                else:
+                    pipe.zadd(MAIL_RETRY_KEY, {failed: time.time() + self.retry_delay * 2 ** (attempts - 1)})
+            pipe.lrem(self.processing_key, 1, raw)
+            await pipe.execute()
+
+
+async def main() -> None:
+    worker = MailWorker()
+    # stop between messages on `docker stop`; anything in flight is requeued on the next start
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    await worker.run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
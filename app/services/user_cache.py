@@ -0,0 +1,137 @@
+"""
+User Cache.
+
+This module caches the users resolved by `get_current_user`, so authenticated requests don't need a
+database lookup. Each worker keeps a small in-process cache in front of Redis. Entries are invalidated
+by `UserService` whenever a cached user changes; the invalidation is published over Redis pub/sub so
+every worker drops its local copy.
+"""
+import asyncio
+import json
+import logging
+from collections import Counter
+
+from app.config import Config
+from app.repository.models import User, UserRole
+from app.utils.cache import TTLCache, redis_client
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = 3600  # seconds
+INVALIDATION_CHANNEL = "user-cache:invalidate"
+RECONNECT_DELAY = 5  # seconds
+
+# Per-process cache statistics: local hits, (Redis) hits, misses and Redis errors
+cache_stats = Counter()
+
+# Per-process cache of user fields, keyed by email
+local_cache = TTLCache(maxsize=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL)
+
+
+def _cache_key(email: str) -> str:
+    return f"user:{email}"
+
+
+def _user_fields(user: User) -> dict:
+    return {
+        "id": user.id,
+        "email": user.email,
+        "is_verified": user.is_verified,
+        "is_active": user.is_active,
+        "avatar": user.avatar,
+        "role": user.role.value if user.role else None,
+    }
+
+
+def _user_from_fields(fields: dict) -> User:
+    # a new object per request, so callers can't modify each other's user
+    return User(**{**fields, "role": UserRole(fields["role"]) if fields["role"] is not None else None})
+
+
+def serialize_user(user: User) -> str:
+    """Serialize the user fields needed by authenticated requests to JSON."""
+    return json.dumps(_user_fields(user))
+
+
+def deserialize_user(data: str) -> User:
+    """Build a (detached) `User` from data produced by `serialize_user`."""
+    return _user_from_fields(json.loads(data))
+
+
+async def get_cached_user(email: str) -> User | None:
+    """
+    Get a user from the cache.
+
+    Args:
+        email (str): Email of the user.
+
+    Returns:
+        User | None: The cached user, or None on a cache miss or if Redis is unavailable.
+    """
+    fields = local_cache.get(email)
+    if fields is not None:
+        cache_stats["local_hits"] += 1
+        return _user_from_fields(fields)
+
+    try:
+        cached_user = await redis_client.get(_cache_key(email))
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.error(f"Redis connection error: {str(e)}")
+        return None
+
+    if cached_user is None:
+        cache_stats["misses"] += 1
+        logger.debug(f"Cache miss for user: {email}")
+        return None
+
+    cache_stats["hits"] += 1
+    logger.debug(f"Cache hit for user: {email}")
+    fields = json.loads(cached_user)
+    local_cache.set(email, fields)
+    return _user_from_fields(fields)
+
+
+async def cache_user(user: User) -> None:
+    """Store a user in the cache."""
+    fields = _user_fields(user)
+    local_cache.set(user.email, fields)
+    try:
+        await redis_client.set(_cache_key(user.email), json.dumps(fields), ex=CACHE_TTL)
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.error(f"Failed to cache user data for {user.email}: {str(e)}")
+
+
+async def invalidate_cached_user(email: str) -> None:
+    """Remove a user from the cache of all workers, so the next request reloads it from the database."""
+    local_cache.pop(email)
+    try:
+        await redis_client.delete(_cache_key(email))
+        await redis_client.publish(INVALIDATION_CHANNEL, email)
+    except Exception as e:
+        cache_stats["errors"] += 1
+        logger.error(f"Failed to invalidate cached user {email}: {str(e)}")
+
+
+async def listen_for_invalidations() -> None:
+    """
+    Drop users invalidated by other workers from the local cache.
+
+    Runs for the lifetime of the application. While disconnected from Redis, invalidations may be
+    missed, so the local cache is cleared whenever the subscription is (re)established.
+    """
+    while True:
+        try:
+            async with redis_client.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                local_cache.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        local_cache.pop(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            cache_stats["errors"] += 1
+            logger.error(f"User cache invalidation listener failed: {str(e)}")
+            await asyncio.sleep(RECONNECT_DELAY)
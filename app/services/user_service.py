@@ -3,22 +3,23 @@ User Service.
 
 This module contains the `UserService` class, which provides functionality for user management.
 """
-import os
-import shutil
 from datetime import timedelta
 
-from fastapi import BackgroundTasks, Depends
+from fastapi import Depends, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import Config
-from app.repository.database import get_db
+from app.repository.database import get_async_db
 from app.repository.models import User
+from app.services.user_cache import invalidate_cached_user
+from app.utils import hashing
+from app.utils.avatars import link_user_avatar, store_avatar
 from app.utils.jwt import create_access_token, create_email_verification_token
 from app.utils.mail import send_verification_email
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
@@ -27,47 +28,70 @@ class UserService:
     A service class for managing users.
 
     Attributes:
-        db (Session): Database session for queries.
+        db (AsyncSession): Database session for queries.
     """
-    def __init__(self, db: Session = Depends(get_db)):
+    def __init__(self, db: AsyncSession = Depends(get_async_db)):
         self.db = db
 
-    def get_user_by_email(self, email: str) -> User | None:
+    async def get_user_by_email(self, email: str) -> User | None:
         """Fetch a user by their email."""
-        return self.db.query(User).filter(User.email == email).first()
+        result = await self.db.execute(select(User).where(User.email == email))
+        return result.scalars().first()
 
-    def create_user(self, email: str, password: str) -> User:
+    async def create_user(self, email: str, password: str) -> User:
         """Create a new user with a hashed password."""
-        hashed_password = pwd_context.hash(password)
+        hashed_password = await hashing.hash_password(password)
         user = User(email=email, hashed_password=hashed_password)
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.commit()
+        await self.db.refresh(user)
         return user
 
-    async def create_user_with_verification(self, email: str, password: str, background_tasks: BackgroundTasks) -> User:
+    async def create_user_with_verification(self, email: str, password: str) -> User:
         """Create a new user and send a verification email."""
-        user = self.create_user(email, password)
+        user = await self.create_user(email, password)
 
         verification_token = create_email_verification_token(user.email)
-        self.add_verification_token(user, verification_token)
-        await send_verification_email(user.email, verification_token, background_tasks)
+        await self.add_verification_token(user, verification_token)
+        await send_verification_email(user.email, verification_token)
         return user
 
-    def add_verification_token(self, user: User, token: str) -> None:
+    async def add_verification_token(self, user: User, token: str) -> None:
         """Assign a verification token to the user and commit to the database."""
         user.verification_token = token
-        self.db.commit()
+        await self.db.commit()
 
-    async def resend_verification_email(self, user: User, background_tasks: BackgroundTasks) -> None:
+    async def resend_verification_email(self, user: User) -> None:
         """Send a verification email to the user."""
         verification_token = create_email_verification_token(user.email)
-        self.add_verification_token(user, verification_token)
-        await send_verification_email(user.email, verification_token, background_tasks)
+        await self.add_verification_token(user, verification_token)
+        await send_verification_email(user.email, verification_token)
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verify if a plaintext password matches a hashed password."""
-        return pwd_context.verify(plain_password, hashed_password)
+        valid, _ = await hashing.verify_password(plain_password, hashed_password)
+        return valid
+
+    async def authenticate(self, email: str, password: str) -> User | None:
+        """
+        Authenticate a user by email and password.
+
+        If the stored hash was made with a different bcrypt cost than the configured one,
+        it is transparently replaced with a new hash of the password.
+
+        Returns:
+            User | None: The user, or None if the email is unknown or the password is wrong.
+        """
+        user = await self.get_user_by_email(email)
+        if not user:
+            return None
+        valid, new_hash = await hashing.verify_password(password, user.hashed_password)
+        if not valid:
+            return None
+        if new_hash:
+            user.hashed_password = new_hash
+            await self.db.commit()
+        return user
 
     def generate_access_token(self, email: str) -> str:
         """Generate a JWT access token for the user."""
@@ -76,32 +100,36 @@ class UserService:
             expires_delta=timedelta(minutes=Config.ACCESS_TOKEN_EXPIRE_MINUTES),
         )
 
-    def verify_user_email(self, user):
+    async def verify_user_email(self, user):
         """Mark the user's email as verified."""
         user.is_verified = True
         user.verification_token = None
-        self.db.commit()
-
-    def update_avatar(self, user: User, avatar_file, avatar_filename: str) -> User:
-        if avatar_file.content_type not in ["image/jpeg", "image/png"]:
-            raise ValueError("Invalid file type. Only JPEG and PNG allowed.")
-
-        avatar_path = f"avatars/{user.id}_{avatar_filename}"
-        os.makedirs("avatars", exist_ok=True)
-
-        with open(avatar_path, "wb") as buffer:
-            shutil.copyfileobj(avatar_file.file, buffer)
-
-        user.avatar = avatar_path
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.commit()
+        await invalidate_cached_user(user.email)
+
+    async def update_avatar(self, user: User, avatar_file: UploadFile) -> User:
+        """
+        Store an uploaded image as the user's avatar.
+
+        Raises:
+            ValueError: If the upload isn't a JPEG, PNG or WebP image within `AVATAR_MAX_SIZE`.
+        """
+        digest = await store_avatar(avatar_file)
+
+        # the current user may come from the cache, detached from this session
+        user = await self.db.get(User, user.id)
+        user.avatar = digest
+        await self.db.commit()
+        await self.db.refresh(user)
+        await run_in_threadpool(link_user_avatar, user.id, digest)
+        await invalidate_cached_user(user.email)
         return user
 
 
-    def update_password(self, user: User, password: str) -> User:
+    async def update_password(self, user: User, password: str) -> User:
         """Update the user's password."""
-        user.hashed_password = pwd_context.hash(password)
-        self.db.commit()
-        self.db.refresh(user)
-        return user
\ No newline at end of file
+        user.hashed_password = await hashing.hash_password(password)
+        await self.db.commit()
+        await self.db.refresh(user)
+        await invalidate_cached_user(user.email)
+        return user
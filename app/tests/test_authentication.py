@@ -1,23 +1,32 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from fastapi import HTTPException
 
 from app.services.authentication import get_current_user, get_current_admin_user
 from app.repository.models import User, UserRole
 
+# Mocking user cache - always a miss unless a test says otherwise
+@pytest.fixture(autouse=True)
+def mock_user_cache():
+    with patch("app.services.authentication.get_cached_user", new_callable=AsyncMock, return_value=None) as get, \
+            patch("app.services.authentication.cache_user", new_callable=AsyncMock) as cache:
+        yield get, cache
+
 # Mocking user service
 @pytest.fixture
 def mock_user_service():
     service = MagicMock()
+    service.get_user_by_email = AsyncMock()
     return service
 
-def test_get_current_user_valid_token(mock_user_service):
+@pytest.mark.asyncio
+async def test_get_current_user_valid_token(mock_user_service):
     mock_user_service.get_user_by_email.return_value = User(
         email="test@example.com", is_verified=True
     )
 
     with patch("app.services.authentication.verify_access_token", return_value="test@example.com"):
-        user = get_current_user(
+        user = await get_current_user(
             token="valid_token",  # Simulating dependency injection for the token
             user_service=mock_user_service
         )
@@ -25,12 +34,38 @@ def test_get_current_user_valid_token(mock_user_service):
     assert user.email == "test@example.com"
     assert user.is_verified is True
 
-def test_get_current_user_invalid_token(mock_user_service):
+@pytest.mark.asyncio
+async def test_get_current_user_caches_user(mock_user_service, mock_user_cache):
+    get_cached_user, cache_user = mock_user_cache
+    db_user = User(id=1, email="test@example.com", is_verified=True)
+    mock_user_service.get_user_by_email.return_value = db_user
+
+    with patch("app.services.authentication.verify_access_token", return_value="test@example.com"):
+        await get_current_user(token="valid_token", user_service=mock_user_service)
+
+    get_cached_user.assert_awaited_once_with("test@example.com")
+    cache_user.assert_awaited_once_with(db_user)
+
+@pytest.mark.asyncio
+async def test_get_current_user_cache_hit(mock_user_service, mock_user_cache):
+    get_cached_user, cache_user = mock_user_cache
+    get_cached_user.return_value = User(id=1, email="test@example.com", is_verified=True, role=UserRole.ADMIN)
+
+    with patch("app.services.authentication.verify_access_token", return_value="test@example.com"):
+        user = await get_current_user(token="valid_token", user_service=mock_user_service)
+
+    assert user.id == 1
+    assert user.role == UserRole.ADMIN
+    mock_user_service.get_user_by_email.assert_not_called()
+    cache_user.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_get_current_user_invalid_token(mock_user_service):
     mock_user_service.get_user_by_email.return_value = None
 
     with patch("app.services.authentication.verify_access_token", return_value=None):
         with pytest.raises(HTTPException) as exc_info:
-            get_current_user(
+            await get_current_user(
                 token="invalid_token",  # Simulating dependency injection for the token
                 user_service=mock_user_service
             )
@@ -38,14 +73,15 @@ def test_get_current_user_invalid_token(mock_user_service):
     assert exc_info.value.status_code == 401
     assert "Invalid or expired token" in exc_info.value.detail
 
-def test_get_current_user_unverified_user(mock_user_service):
+@pytest.mark.asyncio
+async def test_get_current_user_unverified_user(mock_user_service):
     mock_user_service.get_user_by_email.return_value = User(
         email="test@example.com", is_verified=False
     )
 
     with patch("app.services.authentication.verify_access_token", return_value="test@example.com"):
         with pytest.raises(HTTPException) as exc_info:
-            get_current_user(
+            await get_current_user(
                 token="valid_token",  # Simulating dependency injection for the token
                 user_service=mock_user_service
             )
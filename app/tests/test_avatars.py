@@ -0,0 +1,233 @@
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.api.routers import user
+from app.utils.avatars import (AVATAR_SIZES, avatar_path, choose_avatar_size, convert_legacy_avatar, is_avatar_digest,
+                               is_avatar_filename, link_user_avatar, process_avatar, resolve_user_avatar, save_upload,
+                               sniff_image_type, store_avatar)
+
+DIGEST = hashlib.sha256(b"avatar").hexdigest()
+
+
+def _image(format: str, size=(300, 200), mode="RGB") -> bytes:
+    buffer = io.BytesIO()
+    Image.new(mode, size, (255, 0, 0, 128) if mode == "RGBA" else "red").save(buffer, format)
+    return buffer.getvalue()
+
+
+def _upload(data: bytes, content_type: str = "image/png") -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename="avatar", headers={"content-type": content_type})
+
+
+@pytest.fixture
+def avatar_dir(tmp_path):
+    with patch("app.utils.avatars.Config.AVATAR_DIR", str(tmp_path)):
+        yield tmp_path
+
+
+@pytest.fixture
+def client(avatar_dir):
+    for size in AVATAR_SIZES:
+        (avatar_dir / f"{DIGEST}_{size}.webp").write_bytes(_image("WEBP", size=(size, size)))
+    link_user_avatar(1, DIGEST)
+    app = FastAPI()
+    app.include_router(user.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("format, content_type", [("JPEG", "image/jpeg"), ("PNG", "image/png"), ("WEBP", "image/webp")])
+def test_sniff_image_type(format, content_type):
+    assert sniff_image_type(_image(format)[:16]) == content_type
+
+
+def test_sniff_image_type_rejects_other_files():
+    assert sniff_image_type(b"<svg xmlns='http://www.w3.org/2000/svg'/>") is None
+    assert sniff_image_type(_image("GIF")[:16]) is None
+
+
+@pytest.mark.asyncio
+async def test_save_upload_streams_to_disk(tmp_path):
+    data = _image("PNG", size=(1000, 1000))
+
+    path, digest = await save_upload(_upload(data), str(tmp_path), max_size=len(data))
+
+    assert digest == hashlib.sha256(data).hexdigest()
+    with open(path, "rb") as file:
+        assert file.read() == data
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("data, max_size, error", [
+    (_image("PNG"), 100, "File too large"),
+    (b"GIF89a" + b"\x00" * 100, 1000, "Invalid file type"),
+    (b"", 1000, "Empty file"),
+])
+async def test_save_upload_rejects_invalid_uploads(tmp_path, data, max_size, error):
+    # the declared content type is not trusted
+    with pytest.raises(ValueError, match=error):
+        await save_upload(_upload(data, "image/png"), str(tmp_path), max_size=max_size)
+
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("mode", ["RGB", "RGBA"])
+def test_process_avatar_writes_square_webp_variants(tmp_path, mode):
+    source = tmp_path / "upload"
+    source.write_bytes(_image("PNG", mode=mode))
+
+    paths = process_avatar(str(source), "digest", str(tmp_path))
+
+    assert paths == [str(tmp_path / f"digest_{size}.webp") for size in AVATAR_SIZES]
+    for path, size in zip(paths, AVATAR_SIZES):
+        with Image.open(path) as variant:
+            assert (variant.format, variant.size, variant.mode) == ("WEBP", (size, size), mode)
+
+
+def test_concurrent_writes_use_distinct_temporary_files(avatar_dir):
+    source = avatar_dir / "upload"
+    source.write_bytes(_image("PNG"))
+    for size in AVATAR_SIZES:
+        (avatar_dir / f"{DIGEST}_{size}.webp").write_bytes(b"webp")
+
+    # same process, same user and same digest: the temporary names must not collide
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        links = [executor.submit(link_user_avatar, 1, DIGEST) for _ in range(50)]
+        variants = [executor.submit(process_avatar, str(source), "digest", str(avatar_dir)) for _ in range(8)]
+        for future in links + variants:
+            future.result()
+
+    assert resolve_user_avatar(1, 64)[0] == f"{DIGEST}_64.webp"
+    assert not [name for name in os.listdir(avatar_dir) + os.listdir(avatar_dir / "users") if name.endswith(".tmp")]
+
+
+@pytest.mark.asyncio
+async def test_store_avatar_dedupes_identical_uploads(avatar_dir):
+    data = _image("JPEG")
+
+    digest = await store_avatar(_upload(data))
+
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert sorted(os.listdir(avatar_dir)) == sorted(os.path.basename(avatar_path(digest, size)) for size in AVATAR_SIZES)
+
+    with patch("app.utils.avatars.process_avatar") as process:
+        assert await store_avatar(_upload(data)) == digest
+    process.assert_not_called()
+    assert len(os.listdir(avatar_dir)) == len(AVATAR_SIZES)
+
+
+@pytest.mark.asyncio
+async def test_store_avatar_rejects_corrupt_image(avatar_dir):
+    data = _image("PNG")[:16] + b"\x00" * 100
+
+    with pytest.raises(ValueError, match="Invalid image"):
+        await store_avatar(_upload(data))
+
+    assert os.listdir(avatar_dir) == []
+
+
+@pytest.mark.parametrize("size, expected", [(1, 64), (64, 64), (65, 256), (1000, 256)])
+def test_choose_avatar_size(size, expected):
+    assert choose_avatar_size(size) == expected
+
+
+def test_is_avatar_filename():
+    assert is_avatar_filename(f"{DIGEST}_64.webp")
+    assert not is_avatar_filename(f"{DIGEST}_100.webp")
+    assert not is_avatar_filename("../config.py")
+    assert not is_avatar_filename(f"users/{DIGEST}_64.webp")
+
+
+def test_is_avatar_digest():
+    assert is_avatar_digest(DIGEST)
+    assert not is_avatar_digest("avatars/1_me.png")
+
+
+def test_convert_legacy_avatar(avatar_dir):
+    data = _image("PNG")
+    (avatar_dir / "1_me.png").write_bytes(data)
+
+    digest = convert_legacy_avatar(str(avatar_dir / "1_me.png"))
+
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert all(os.path.exists(avatar_path(digest, size)) for size in AVATAR_SIZES)
+
+
+def test_convert_legacy_avatar_missing_or_invalid(avatar_dir):
+    (avatar_dir / "1_me.gif").write_bytes(_image("GIF"))
+
+    assert convert_legacy_avatar(str(avatar_dir / "1_missing.png")) is None
+    assert convert_legacy_avatar(str(avatar_dir / "1_me.gif")) is None
+
+
+def test_link_user_avatar_replaces_previous_avatar(avatar_dir):
+    other = hashlib.sha256(b"other").hexdigest()
+    for digest in (DIGEST, other):
+        for size in AVATAR_SIZES:
+            (avatar_dir / f"{digest}_{size}.webp").write_bytes(b"webp")
+
+    link_user_avatar(1, DIGEST)
+    link_user_avatar(1, other)
+
+    filename, stat_result = resolve_user_avatar(1, 64)
+    assert filename == f"{other}_64.webp"
+    assert stat_result.st_size == 4
+    assert resolve_user_avatar(2, 64) is None
+    assert sorted(os.listdir(avatar_dir / "users")) == ["1_256.webp", "1_64.webp"]
+
+
+def test_get_user_avatar(client, avatar_dir):
+    response = client.get("/user/1/avatar", params={"size": 48})
+
+    assert response.status_code == 200
+    assert response.content == (avatar_dir / f"{DIGEST}_64.webp").read_bytes()
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["etag"] == f'"{DIGEST}_64"'
+    assert response.headers["cache-control"] == "public, no-cache"
+    assert response.headers["content-location"] == f"/user/avatars/{DIGEST}_64.webp"
+
+
+def test_get_user_avatar_not_modified(client):
+    response = client.get("/user/1/avatar", headers={"If-None-Match": f'"{DIGEST}_256"'})
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_get_user_avatar_range(client, avatar_dir):
+    response = client.get("/user/1/avatar", headers={"Range": "bytes=0-9"})
+
+    assert response.status_code == 206
+    assert response.content == (avatar_dir / f"{DIGEST}_256.webp").read_bytes()[:10]
+
+
+def test_get_user_avatar_without_avatar(client):
+    assert client.get("/user/2/avatar").status_code == 404
+
+
+def test_get_avatar_file_is_immutable(client, avatar_dir):
+    response = client.get(f"/user/avatars/{DIGEST}_64.webp")
+
+    assert response.status_code == 200
+    assert response.content == (avatar_dir / f"{DIGEST}_64.webp").read_bytes()
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+
+@pytest.mark.parametrize("filename", [f"{'0' * 64}_64.webp", "..%2Fconfig.py", f"{DIGEST}_64.png"])
+def test_get_avatar_file_not_found(client, filename):
+    assert client.get(f"/user/avatars/{filename}").status_code == 404
+
+
+def test_get_user_avatar_through_nginx(client):
+    with patch("app.api.routers.user.Config.AVATAR_ACCEL_REDIRECT", "/internal/avatars"):
+        response = client.get("/user/1/avatar", params={"size": 64})
+
+    assert response.headers["x-accel-redirect"] == f"/internal/avatars/{DIGEST}_64.webp"
+    assert response.content == b""
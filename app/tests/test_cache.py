@@ -0,0 +1,52 @@
+from unittest.mock import patch
+
+from app.utils.cache import TTLCache
+
+
+def test_ttl_cache_get_and_set():
+    cache = TTLCache(maxsize=2, ttl=60)
+
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("missing") is None
+    assert cache.get("missing", "default") == "default"
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=2, ttl=60)
+    with patch("app.utils.cache.time.monotonic", return_value=1000):
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=5)
+
+    with patch("app.utils.cache.time.monotonic", return_value=1010):
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert len(cache) == 1
+
+
+def test_ttl_cache_pop_and_clear():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.pop("a")
+    cache.pop("missing")
+    assert cache.get("a") is None
+
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,107 @@
+import gzip
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.utils.compression import CompressionMiddleware, choose_encoding, is_compressible
+
+BODY = b'{"first_name": "John", "last_name": "Doe"}' * 100
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    async def large():
+        return Response(BODY, media_type="application/json")
+
+    @app.get("/small")
+    async def small():
+        return Response(BODY[:100], media_type="application/json")
+
+    @app.get("/image")
+    async def image():
+        return Response(BODY, media_type="image/png")
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(gzip.compress(BODY), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(3):
+                yield BODY
+        return StreamingResponse(chunks(), media_type="text/csv")
+
+    return TestClient(app)
+
+
+def _get_raw(client, path: str, accept_encoding: str):
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("br;q=0, gzip;q=0.5", "gzip"),
+    ("br;q=0.1, gzip;q=1.0", "gzip"),
+    ("gzip;q=0.5, br;q=0.5", "br"),
+    ("gzip, *;q=0.2", "gzip"),
+    ("*", "br"),
+    ("identity", None),
+    ("", None),
+])
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+def test_is_compressible():
+    assert is_compressible("application/json")
+    assert is_compressible("image/svg+xml")
+    assert not is_compressible("image/jpeg")
+
+
+def test_compresses_large_response_with_brotli(client):
+    response, raw = _get_raw(client, "/large", "gzip, br")
+
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(raw) < len(BODY)
+    assert brotli.decompress(raw) == BODY
+
+
+def test_compresses_large_response_with_gzip(client):
+    response, raw = _get_raw(client, "/large", "gzip")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw) == BODY
+
+
+@pytest.mark.parametrize("path", ["/small", "/image"])
+def test_leaves_small_and_incompressible_responses(client, path):
+    response, raw = _get_raw(client, path, "gzip, br")
+
+    assert "content-encoding" not in response.headers
+    assert raw == (BODY if path == "/image" else BODY[:100])
+
+
+def test_leaves_encoded_response(client):
+    response, raw = _get_raw(client, "/encoded", "br")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(raw) == BODY
+
+
+def test_compresses_streaming_response(client):
+    response, raw = _get_raw(client, "/stream", "gzip")
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(raw) == BODY * 3
@@ -0,0 +1,15 @@
+import pytest
+
+from app.config import async_database_url
+
+
+@pytest.mark.parametrize("database_url, expected", [
+    ("postgresql://user:secret@db:5432/contacts", "postgresql+asyncpg://user:secret@db:5432/contacts"),
+    ("postgresql+psycopg2://user:secret@db/contacts", "postgresql+asyncpg://user:secret@db/contacts"),
+    ("postgresql+asyncpg://user@db/contacts", "postgresql+asyncpg://user@db/contacts"),
+    ("sqlite:///contacts.db", None),
+    ("not a url", None),
+    (None, None),
+])
+def test_async_database_url(database_url, expected):
+    assert async_database_url(database_url) == expected
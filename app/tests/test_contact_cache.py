@@ -0,0 +1,102 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import contact_cache
+from app.services.contact_cache import bump_version, cache_stats, current_version, get_or_build, get_version
+
+
+@pytest.fixture
+def mock_redis():
+    with patch.object(contact_cache, "redis_client", new=AsyncMock()) as redis:
+        yield redis
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    cache_stats.clear()
+
+
+@pytest.mark.asyncio
+async def test_get_version(mock_redis):
+    mock_redis.get.return_value = "7"
+
+    assert await get_version(1) == 7
+    mock_redis.get.assert_awaited_once_with("contacts:1:version")
+    mock_redis.set.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_version_initialises_missing_counter(mock_redis):
+    mock_redis.get.side_effect = [None, "1700000000000000000"]
+
+    assert await get_version(1) == 1700000000000000000
+    assert mock_redis.set.call_args.kwargs == {"nx": True}
+
+
+@pytest.mark.asyncio
+async def test_current_version_redis_unavailable(mock_redis):
+    mock_redis.get.side_effect = ConnectionError("Redis is down")
+
+    assert await current_version(1) is None
+    assert cache_stats == {"errors": 1}
+
+
+@pytest.mark.asyncio
+async def test_bump_version(mock_redis):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    mock_redis.pipeline = MagicMock()
+    mock_redis.pipeline.return_value.__aenter__.return_value = pipe
+
+    await bump_version(1)
+
+    assert mock_redis.pipeline.call_args.kwargs == {"transaction": True}
+    pipe.incr.assert_called_once_with("contacts:1:version")
+    pipe.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_or_build_hit(mock_redis):
+    mock_redis.get.side_effect = ["7", '{"id": 1}']
+    build = AsyncMock()
+
+    assert await get_or_build(1, "contact:1", build) == '{"id": 1}'
+    assert mock_redis.get.call_args.args == ("contacts:1:7:contact:1",)
+    build.assert_not_called()
+    assert cache_stats == {"hits": 1}
+
+
+@pytest.mark.asyncio
+async def test_get_or_build_miss(mock_redis):
+    mock_redis.get.side_effect = ["7", None]
+    build = AsyncMock(return_value='{"id": 1}')
+
+    assert await get_or_build(1, "contact:1", build) == '{"id": 1}'
+    mock_redis.set.assert_awaited_once_with("contacts:1:7:contact:1", '{"id": 1}', ex=contact_cache.Config.CONTACT_CACHE_TTL)
+    assert cache_stats == {"misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_get_or_build_does_not_cache_missing_response(mock_redis):
+    mock_redis.get.side_effect = ["7", None]
+
+    assert await get_or_build(1, "contact:1", AsyncMock(return_value=None)) is None
+    mock_redis.set.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_or_build_redis_unavailable(mock_redis):
+    mock_redis.get.side_effect = ConnectionError("Redis is down")
+    build = AsyncMock(return_value='{"id": 1}')
+
+    assert await get_or_build(1, "contact:1", build) == '{"id": 1}'
+    assert cache_stats == {"errors": 1}
+
+
+@pytest.mark.asyncio
+async def test_get_or_build_with_known_version(mock_redis):
+    mock_redis.get.return_value = '{"id": 1}'
+
+    assert await get_or_build(1, "contact:1", AsyncMock(), version=7) == '{"id": 1}'
+    mock_redis.get.assert_awaited_once_with("contacts:1:7:contact:1")
@@ -0,0 +1,53 @@
+import json
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from app.utils import contact_export
+from app.utils.contact_export import to_csv, to_ndjson
+
+
+async def rows(count: int):
+    for i in range(1, count + 1):
+        yield {"id": i, "first_name": "John", "last_name": "Doe", "email": f"john{i}@example.com",
+               "phone": "123", "birthday": date(1990, 1, i), "additional_info": "likes \"quotes\", commas"}
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_to_csv():
+    chunks = await collect(to_csv(rows(2)))
+
+    assert "".join(chunks).splitlines() == [
+        "id,first_name,last_name,email,phone,birthday,additional_info",
+        '1,John,Doe,john1@example.com,123,1990-01-01,"likes ""quotes"", commas"',
+        '2,John,Doe,john2@example.com,123,1990-01-02,"likes ""quotes"", commas"',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_to_ndjson():
+    chunks = await collect(to_ndjson(rows(2)))
+
+    lines = "".join(chunks).splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[1]) == {"id": 2, "first_name": "John", "last_name": "Doe", "email": "john2@example.com",
+                                    "phone": "123", "birthday": "1990-01-02", "additional_info": 'likes "quotes", commas'}
+
+
+@pytest.mark.asyncio
+async def test_export_is_sent_in_chunks():
+    with patch.object(contact_export, "ROWS_PER_CHUNK", 2):
+        chunks = await collect(to_ndjson(rows(5)))
+
+    assert [chunk.count("\n") for chunk in chunks] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_empty_export():
+    assert await collect(to_ndjson(rows(0))) == []
+    assert await collect(to_csv(rows(0))) == ["id,first_name,last_name,email,phone,birthday,additional_info\r\n"]
@@ -0,0 +1,49 @@
+import pytest
+
+from app.utils.contact_import import iter_lines, parse_csv, parse_ndjson
+
+
+async def stream(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(rows):
+    return [row async for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_iter_lines_across_chunks():
+    # "é" is split between two chunks
+    lines = await collect(iter_lines(stream(b"first\nsec", b"ond\r\nth", b"ird \xc3", b"\xa9")))
+
+    assert lines == ["first\n", "second\r\n", "third é"]
+
+
+@pytest.mark.asyncio
+async def test_parse_ndjson():
+    rows = await collect(parse_ndjson(stream(
+        b'{"first_name": "John"}\n\n[1, 2]\n',
+        b'{"first_name": \n',
+        b'{"first_name": "Jane"}',
+    )))
+
+    assert rows[0] == (1, {"first_name": "John"}, None)
+    assert rows[1] == (2, None, "Expected a JSON object")
+    assert rows[2][0] == 3 and rows[2][1] is None and rows[2][2].startswith("Invalid JSON")
+    assert rows[3] == (4, {"first_name": "Jane"}, None)
+
+
+@pytest.mark.asyncio
+async def test_parse_csv():
+    rows = await collect(parse_csv(stream(
+        b"\xef\xbb\xbffirst_name,last_name,additional_info\r\n",
+        b'John,Doe,"met at\nschool, 2010"\r\nJane,Smith,\r\n',
+        b"Jim,Beam\r\n",
+    )))
+
+    assert rows == [
+        (1, {"first_name": "John", "last_name": "Doe", "additional_info": "met at\nschool, 2010"}, None),
+        (2, {"first_name": "Jane", "last_name": "Smith", "additional_info": None}, None),
+        (3, None, "Expected 3 columns, got 2"),
+    ]
@@ -1,17 +1,42 @@
-from datetime import date, timedelta
-from unittest.mock import MagicMock
+import json
+from collections import namedtuple
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from pydantic import ValidationError
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
 
-from app.api.schemas import ContactCreate
+from app.api.schemas import ContactBulkUpdate, ContactCreate, ContactUpdate
+from app.repository.database import Base
 from app.repository.models import Contact, User
-from app.services.contact_service import ContactService
+from app.services.contact_service import CONTACT_FIELDS, SYNC_OVERLAP, ContactService, page_json
+from app.utils.pagination import decode_cursor, decode_sync_token, encode_cursor, encode_sync_token
+
+ContactRow = namedtuple("ContactRow", CONTACT_FIELDS)
+
+
+# Mocking dependencies - contact cache, db_session, current_user
+@pytest.fixture(autouse=True)
+def mock_contact_cache():
+    with patch("app.services.contact_service.contact_cache") as cache:
+        cache.bump_version = AsyncMock()
+        async def get_or_build(owner_id, key, build, version=None):
+            return await build()
+
+        cache.get_or_build = AsyncMock(side_effect=get_or_build)
+        yield cache
 
 
-# Mocking dependencies - db_session, current_user
 @pytest.fixture
 def mock_db_session():
-    return MagicMock()
+    session = AsyncMock()
+    session.add = MagicMock()
+    session.get_bind = MagicMock()
+    session.execute.return_value = MagicMock()
+    return session
 
 
 @pytest.fixture
@@ -19,22 +44,98 @@ def mock_current_user():
     return User(id=1, email="test@example.com", is_verified=True)
 
 
-def test_get_all_contacts(mock_db_session, mock_current_user):
-    mock_db_session.query.return_value.filter.return_value = [
+@pytest.mark.asyncio
+async def test_get_all_contacts(mock_db_session, mock_current_user):
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [
         Contact(id=1, first_name="John", last_name="Doe", owner_id=1),
         Contact(id=2, first_name="Jane", last_name="Smith", owner_id=1),
     ]
 
     service = ContactService(db=mock_db_session, user=mock_current_user)
 
-    contacts = service.get_all_contacts()
+    contacts, next_cursor = await service.get_all_contacts(limit=10)
 
     assert len(contacts) == 2
     assert contacts[0].first_name == "John"
     assert contacts[1].first_name == "Jane"
+    assert next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_all_contacts_next_page(mock_db_session, mock_current_user):
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [
+        Contact(id=3, first_name="John", last_name="Doe", owner_id=1),
+        Contact(id=7, first_name="Jane", last_name="Smith", owner_id=1),
+        Contact(id=9, first_name="Jim", last_name="Beam", owner_id=1),
+    ]
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    contacts, next_cursor = await service.get_all_contacts(limit=2, cursor=encode_cursor(1))
+
+    query = mock_db_session.execute.call_args.args[0]
+    params = query.compile().params
+    assert "contacts.id > :id_1" in str(query)
+    assert params["id_1"] == 1
+    assert params["param_1"] == 3  # one row more than the page size
+    assert [contact.id for contact in contacts] == [3, 7]
+    assert decode_cursor(next_cursor) == 7
+
+
+@pytest.mark.asyncio
+async def test_get_all_contacts_projection(mock_db_session, mock_current_user):
+    rows = [MagicMock(id=1), MagicMock(id=2)]
+    mock_db_session.execute.return_value.all.return_value = rows
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    contacts, next_cursor = await service.get_all_contacts(limit=10, fields=["phone", "first_name"])
+
+    query = str(mock_db_session.execute.call_args.args[0])
+    assert query.startswith("SELECT contacts.first_name, contacts.phone, contacts.id \nFROM contacts")
+    assert "additional_info" not in query
+    assert contacts == rows
+    assert next_cursor is None
 
 
-def test_create_contact(mock_db_session, mock_current_user):
+@pytest.mark.asyncio
+async def test_get_all_contacts_unknown_field(mock_db_session, mock_current_user):
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    with pytest.raises(ValueError, match="Unknown fields: owner_id"):
+        await service.get_all_contacts(limit=10, fields=["phone", "owner_id"])
+
+
+@pytest.mark.asyncio
+async def test_get_all_contacts_invalid_cursor(mock_db_session, mock_current_user):
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    with pytest.raises(ValueError):
+        await service.get_all_contacts(limit=10, cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_get_contacts_by_ids(mock_db_session, mock_current_user):
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [
+        Contact(id=3, first_name="John", owner_id=1),
+        Contact(id=7, first_name="Jane", owner_id=1),
+    ]
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    contacts, missing = await service.get_contacts_by_ids([7, 5, 3, 7])
+
+    query = mock_db_session.execute.call_args.args[0]
+    compiled = query.compile(dialect=postgresql.dialect())
+    assert "contacts.id = ANY (%(ids)s::INTEGER[])" in str(compiled)
+    assert compiled.params["ids"] == [7, 5, 3]
+    mock_db_session.execute.assert_awaited_once()
+    assert [contact.id for contact in contacts] == [7, 3]
+    assert missing == [5]
+
+
+@pytest.mark.asyncio
+async def test_create_contact(mock_db_session, mock_current_user, mock_contact_cache):
     mock_contact_data = ContactCreate(
         first_name="John",
         last_name="Doe",
@@ -46,71 +147,436 @@ def test_create_contact(mock_db_session, mock_current_user):
 
     service = ContactService(db=mock_db_session, user=mock_current_user)
 
-    new_contact = service.create_contact(contact_data=mock_contact_data)
+    new_contact = await service.create_contact(contact_data=mock_contact_data)
 
     mock_db_session.add.assert_called_once()
-    mock_db_session.commit.assert_called_once()
-    mock_db_session.refresh.assert_called_once()
+    mock_db_session.commit.assert_awaited_once()
+    mock_db_session.refresh.assert_awaited_once()
+    mock_contact_cache.bump_version.assert_awaited_once_with(mock_current_user.id)
     assert new_contact.first_name == "John"
     assert new_contact.owner_id == mock_current_user.id
 
 
-def test_delete_contact(mock_db_session, mock_current_user):
-    mock_contact = Contact(id=1, first_name="John", owner_id=1)
-    mock_db_session.query.return_value.filter.return_value.first.return_value = mock_contact
+@pytest.mark.asyncio
+async def test_get_all_contacts_json(mock_db_session, mock_current_user, mock_contact_cache):
+    mock_db_session.execute.return_value.all.return_value = [
+        ContactRow(first_name="John", last_name="Doe", email="john@example.com", phone="123",
+                   birthday=date(1990, 1, 1), additional_info=None, id=1),
+    ]
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    page = await service.get_all_contacts_json(limit=10)
+
+    query = str(mock_db_session.execute.call_args.args[0])
+    assert query.startswith("SELECT contacts.first_name, contacts.last_name, contacts.email")  # rows, not entities
+    assert mock_contact_cache.get_or_build.call_args.args[:2] == (mock_current_user.id, "list:10:")
+    assert json.loads(page) == {
+        "items": [{"first_name": "John", "last_name": "Doe", "email": "john@example.com", "phone": "123",
+                   "birthday": "1990-01-01", "additional_info": None, "id": 1}],
+        "next_cursor": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_all_contacts_json_projection_cache_key(mock_db_session, mock_current_user, mock_contact_cache):
+    mock_db_session.execute.return_value.all.return_value = []
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    await service.get_all_contacts_json(limit=10, fields=["phone", "first_name", "phone"])
+
+    assert mock_contact_cache.get_or_build.call_args.args[1] == "list:10::first_name,phone,id"
+
+
+@pytest.mark.asyncio
+async def test_get_contact_json_not_found(mock_db_session, mock_current_user, mock_contact_cache):
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = None
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    assert await service.get_contact_json(contact_id=999) is None
+    assert mock_contact_cache.get_or_build.call_args.args[:2] == (mock_current_user.id, "contact:999")
+
+
+async def parsed_rows(*rows):
+    for row in rows:
+        yield row
+
+
+def contact_row(email: str) -> dict:
+    return {"first_name": "John", "last_name": "Doe", "email": email, "phone": "123456789",
+            "birthday": "1990-01-01", "additional_info": None}
+
+
+@pytest.mark.asyncio
+async def test_import_contacts(mock_db_session, mock_current_user, mock_contact_cache):
+    mock_db_session.execute.return_value.scalars.return_value.all.side_effect = [
+        ["john1@example.com"],
+        ["john3@example.com"],
+    ]
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    created, failed, errors = await service.import_contacts(parsed_rows(
+        (1, contact_row("john1@example.com"), None),
+        (2, contact_row("not-an-email"), None),
+        (3, None, "Invalid JSON"),
+        (4, contact_row("john1@example.com"), None),  # repeated within the batch
+        (5, contact_row("john2@example.com"), None),  # already exists
+        (6, contact_row("john3@example.com"), None),
+    ), batch_size=3)
+
+    assert mock_db_session.execute.await_count == 2
+    statement = mock_db_session.execute.call_args_list[0].args[0]
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (owner_id, email) DO NOTHING RETURNING contacts.email" in sql
+    assert statement.compile(dialect=postgresql.dialect()).params["owner_id_m0"] == mock_current_user.id
+    mock_db_session.commit.assert_awaited_once()
+    mock_contact_cache.bump_version.assert_awaited_once_with(mock_current_user.id)
+    assert created == 2
+    assert failed == 4
+    assert [error["row"] for error in errors] == [2, 3, 4, 5]
+    assert errors[0]["error"].startswith("email:")
+    assert errors[2]["error"] == "A contact with this email already exists"
+
+
+@pytest.mark.asyncio
+async def test_import_contacts_rolls_back_on_database_error(mock_db_session, mock_current_user):
+    mock_db_session.execute.side_effect = RuntimeError("connection lost")
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    with pytest.raises(RuntimeError):
+        await service.import_contacts(parsed_rows((1, contact_row("john1@example.com"), None)))
+
+    mock_db_session.rollback.assert_awaited_once()
+    mock_db_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_export_contacts(mock_db_session, mock_current_user):
+    rows = [{"id": 1, "first_name": "John"}, {"id": 2, "first_name": "Jane"}]
+    export_session = AsyncMock()
+    export_session.stream.return_value.mappings = MagicMock(return_value=parsed_rows(*rows))
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    with patch("app.services.contact_service.AsyncSessionLocal") as session_factory:
+        session_factory.return_value.__aenter__.return_value = export_session
+        exported = [row async for row in service.export_contacts()]
+
+    query = export_session.stream.call_args.args[0]
+    assert query.get_execution_options()["yield_per"] == 1000
+    assert "WHERE contacts.owner_id = :owner_id_1 ORDER BY contacts.id" in str(query)
+    assert "contacts.additional_info" in str(query)
+    assert exported == rows
+    mock_db_session.execute.assert_not_called()  # the request session may be closed while streaming
+
+
+@pytest.mark.asyncio
+async def test_update_contact(mock_db_session, mock_current_user, mock_contact_cache):
+    updated = Contact(id=1, first_name="Johnny", owner_id=1)
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = updated
+    contact_data = ContactCreate(first_name="Johnny", last_name="Doe", email="john@example.com",
+                                 phone="123", birthday=date(1990, 1, 1), additional_info=None)
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    result = await service.update_contact(contact_id=1, updated_data=contact_data)
+
+    query = mock_db_session.execute.call_args.args[0]
+    compiled = str(query.compile(dialect=postgresql.dialect()))
+    assert compiled.startswith("UPDATE contacts SET")
+    assert "WHERE contacts.id = %(id_1)s AND contacts.owner_id = %(owner_id_1)s RETURNING" in compiled
+    mock_db_session.execute.assert_awaited_once()  # no SELECT before, no refresh after
+    mock_db_session.refresh.assert_not_called()
+    mock_db_session.commit.assert_awaited_once()
+    mock_contact_cache.bump_version.assert_awaited_once_with(mock_current_user.id)
+    assert result is updated
+
+
+@pytest.mark.asyncio
+async def test_patch_contact_sets_only_given_fields(mock_db_session, mock_current_user):
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = Contact(id=1, owner_id=1)
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    await service.patch_contact(contact_id=1, changes=ContactUpdate(phone="555", additional_info=None))
+
+    query = mock_db_session.execute.call_args.args[0]
+    compiled = str(query.compile(dialect=postgresql.dialect()))
+    assert "SET phone=%(phone)s, additional_info=%(additional_info)s, updated_at=now()" in compiled
+    assert "first_name" not in compiled.split("RETURNING")[0]
+
+
+@pytest.mark.asyncio
+async def test_patch_contact_not_found(mock_db_session, mock_current_user, mock_contact_cache):
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = None
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    result = await service.patch_contact(contact_id=999, changes=ContactUpdate(phone="555"))
+
+    mock_db_session.commit.assert_not_called()
+    mock_contact_cache.bump_version.assert_not_called()
+    assert result is None
+
+
+def test_contact_update_rejects_null_for_required_fields():
+    assert ContactUpdate(additional_info=None).model_dump(exclude_unset=True) == {"additional_info": None}
+    with pytest.raises(ValidationError):
+        ContactUpdate(first_name=None)
+
+
+@pytest.mark.asyncio
+async def test_update_contacts(mock_db_session, mock_current_user, mock_contact_cache):
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [7, 3]
 
     service = ContactService(db=mock_db_session, user=mock_current_user)
 
-    result = service.delete_contact(contact_id=1)
+    updated = await service.update_contacts([3, 5, 7], ContactUpdate(additional_info="met at the conference"))
+
+    query = mock_db_session.execute.call_args.args[0]
+    compiled = query.compile(dialect=postgresql.dialect())
+    assert "SET additional_info=%(additional_info)s, updated_at=now()" in str(compiled)
+    assert "WHERE contacts.owner_id = %(owner_id_1)s AND contacts.id = ANY (%(ids)s::INTEGER[])" in str(compiled)
+    assert compiled.params["ids"] == [3, 5, 7]
+    mock_db_session.execute.assert_awaited_once()
+    mock_db_session.commit.assert_awaited_once()
+    mock_contact_cache.bump_version.assert_awaited_once_with(mock_current_user.id)
+    assert updated == [3, 7]
 
-    mock_db_session.delete.assert_called_once_with(mock_contact)
-    mock_db_session.commit.assert_called_once()
+
+def test_contact_bulk_update_rejects_email():
+    with pytest.raises(ValidationError):
+        ContactBulkUpdate(ids=[1, 2], changes={"email": "same@example.com"})
+    with pytest.raises(ValidationError):
+        ContactBulkUpdate(ids=[1, 2], changes={})
+
+
+@pytest.mark.asyncio
+async def test_delete_contact(mock_db_session, mock_current_user, mock_contact_cache):
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [1]
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    result = await service.delete_contact(contact_id=1)
+
+    query = mock_db_session.execute.call_args.args[0]
+    compiled = str(query.compile(dialect=postgresql.dialect()))
+    assert compiled.startswith("WITH deleted AS \n(DELETE FROM contacts")
+    assert "INSERT INTO deleted_contacts (id, owner_id) SELECT deleted.id, deleted.owner_id" in compiled
+    assert query.compile().params == {"id_1": 1, "owner_id_1": mock_current_user.id}
+    mock_db_session.execute.assert_awaited_once()
+    mock_db_session.commit.assert_awaited_once()
+    mock_contact_cache.bump_version.assert_awaited_once_with(mock_current_user.id)
     assert result is True
 
 
-def test_delete_contact_not_found(mock_db_session, mock_current_user):
-    mock_db_session.query.return_value.filter.return_value.first.return_value = None
+@pytest.mark.asyncio
+async def test_delete_contact_not_found(mock_db_session, mock_current_user, mock_contact_cache):
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = []
 
     service = ContactService(db=mock_db_session, user=mock_current_user)
 
-    result = service.delete_contact(contact_id=999)
+    result = await service.delete_contact(contact_id=999)
 
-    mock_db_session.delete.assert_not_called()
     mock_db_session.commit.assert_not_called()
+    mock_contact_cache.bump_version.assert_not_called()
     assert result is False
 
 
+@pytest.mark.asyncio
+async def test_delete_contacts(mock_db_session, mock_current_user, mock_contact_cache):
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [9, 4]
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    deleted = await service.delete_contacts([4, 9, 12])
+
+    query = mock_db_session.execute.call_args.args[0]
+    compiled = query.compile(dialect=postgresql.dialect())
+    assert "contacts.id = ANY (%(ids)s::INTEGER[])" in str(compiled)
+    assert compiled.params["ids"] == [4, 9, 12]
+    mock_db_session.execute.assert_awaited_once()
+    mock_db_session.commit.assert_awaited_once()
+    mock_contact_cache.bump_version.assert_awaited_once_with(mock_current_user.id)
+    assert deleted == [4, 9]
+
+
+@pytest.mark.asyncio
+async def test_get_changes_full_sync(mock_db_session, mock_current_user):
+    now = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    mock_db_session.scalar.return_value = now
+    contacts = [Contact(id=1, first_name="John", owner_id=1, updated_at=now)]
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = contacts
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    changed, deleted, next_token, has_more = await service.get_changes(since=None, limit=10)
+
+    query = str(mock_db_session.execute.call_args.args[0])
+    assert "ORDER BY contacts.updated_at, contacts.id" in query
+    mock_db_session.execute.assert_awaited_once()  # no tombstones on a full sync
+    assert changed == contacts
+    assert deleted == []
+    assert decode_sync_token(next_token) == (now - SYNC_OVERLAP, 0)
+    assert has_more is False
+
+
+@pytest.mark.asyncio
+async def test_get_changes_since_token(mock_db_session, mock_current_user):
+    since = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    updated_at = datetime(2025, 1, 1, 12, 5, tzinfo=timezone.utc)
+    mock_db_session.scalar.return_value = datetime(2025, 1, 1, 13, 0, tzinfo=timezone.utc)
+    changed_result, deleted_result = MagicMock(), MagicMock()
+    changed_result.scalars.return_value.all.return_value = [
+        Contact(id=4, first_name="John", owner_id=1, updated_at=updated_at),
+        Contact(id=9, first_name="Jane", owner_id=1, updated_at=updated_at),
+    ]
+    deleted_result.scalars.return_value.all.return_value = [2]
+    mock_db_session.execute.side_effect = [changed_result, deleted_result]
+
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    changed, deleted, next_token, has_more = await service.get_changes(since=encode_sync_token(since, 3), limit=1)
+
+    changed_query, deleted_query = (call.args[0] for call in mock_db_session.execute.call_args_list)
+    assert "(contacts.updated_at, contacts.id) >" in str(changed_query)
+    assert "deleted_contacts.deleted_at >" in str(deleted_query)
+    assert "deleted_contacts.deleted_at <=" in str(deleted_query)  # up to the last change sent
+    assert [contact.id for contact in changed] == [4]
+    assert deleted == [2]
+    assert decode_sync_token(next_token) == (updated_at, 4)
+    assert has_more is True
+
+
+@pytest.mark.asyncio
+async def test_get_changes_invalid_token(mock_db_session, mock_current_user):
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    with pytest.raises(ValueError):
+        await service.get_changes(since="not-a-token", limit=10)
+
+
 def test_get_contacts_for_user(mock_db_session, mock_current_user):
-    mock_db_session.query.return_value.filter.return_value = [
+    service = ContactService(db=mock_db_session, user=mock_current_user)
+
+    query = service._get_contacts_for_user()
+
+    assert query.column_descriptions[0]["entity"] is Contact
+    assert "contacts.owner_id = :owner_id_1" in str(query)
+    assert query.compile().params["owner_id_1"] == mock_current_user.id
+
+
+@pytest.mark.asyncio
+async def test_search_contacts_ranked(mock_db_session, mock_current_user):
+    mock_db_session.get_bind.return_value.dialect.name = "sqlite"
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = [
         Contact(id=1, first_name="John", last_name="Doe", owner_id=1),
-        Contact(id=2, first_name="Jane", last_name="Smith", owner_id=1),
     ]
 
     service = ContactService(db=mock_db_session, user=mock_current_user)
 
-    contacts = service._get_contacts_for_user()
+    contacts, next_cursor = await service.search_contacts(limit=10, cursor=encode_cursor(5), q="john")
 
-    mock_db_session.query.assert_called_once_with(Contact)
-    assert mock_db_session.query.return_value.filter.call_count == 1
-    assert len(contacts) == 2
-    assert contacts[0].first_name == "John"
-    assert contacts[1].first_name == "Jane"
+    query = str(mock_db_session.execute.call_args.args[0])
+    assert "contacts.id >" not in query  # ranked results are not paginated
+    assert "ORDER BY" in query
+    assert len(contacts) == 1
+    assert next_cursor is None
 
 
-def test_get_upcoming_birthdays(mock_db_session, mock_current_user):
-    today = date.today()
-    upcoming_birthday = today + timedelta(days=5)
-    contacts = [
-        Contact(id=1, first_name="John", last_name="Doe", birthday=upcoming_birthday, owner_id=1),
-        Contact(id=2, first_name="Jane", last_name="Smith", birthday=today + timedelta(days=15), owner_id=1),
-    ]
-    mock_db_session.query.return_value.filter.return_value = contacts
+@pytest.mark.asyncio
+async def test_get_upcoming_birthdays(mock_db_session, mock_current_user):
+    contacts = [Contact(id=1, first_name="John", last_name="Doe", birthday=date(1990, 1, 5), owner_id=1)]
+    mock_db_session.execute.return_value.scalars.return_value.all.return_value = contacts
 
     service = ContactService(db=mock_db_session, user=mock_current_user)
 
-    start_date = today
-    end_date = today + timedelta(days=10)
-    birthdays = service.get_upcoming_birthdays(start_date=start_date, end_date=end_date)
+    birthdays, next_cursor = await service.get_upcoming_birthdays(
+        start_date=date(2025, 1, 1), end_date=date(2025, 1, 10), limit=10
+    )
+
+    query = mock_db_session.execute.call_args.args[0]
+    assert "contacts.birthday_ordinal BETWEEN" in str(query)
+    assert birthdays == contacts
+    assert next_cursor is None
 
-    assert len(birthdays) == 1
-    assert birthdays[0].first_name == "John"
+
+@pytest.fixture
+def sqlite_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    birthdays = [date(1990, 1, 5), date(1985, 2, 28), date(1992, 2, 29), date(1980, 3, 1),
+                 date(1975, 12, 30), date(2000, 6, 15)]
+    with Session(engine) as session:
+        session.add_all(
+            Contact(first_name="Contact", last_name=str(i), email=f"contact{i}@example.com", phone="123",
+                    birthday=birthday, owner_id=1)
+            for i, birthday in enumerate(birthdays)
+        )
+        session.commit()
+        yield session
+
+
+@pytest.mark.parametrize("start_date, end_date, expected", [
+    (date(2025, 1, 1), date(2025, 1, 10), [date(1990, 1, 5)]),
+    # wraps around New Year
+    (date(2025, 12, 28), date(2026, 1, 6), [date(1990, 1, 5), date(1975, 12, 30)]),
+    # Feb 29 birthdays are listed on Feb 28 in non-leap years...
+    (date(2025, 2, 20), date(2025, 2, 28), [date(1985, 2, 28), date(1992, 2, 29)]),
+    (date(2025, 3, 1), date(2025, 3, 7), [date(1980, 3, 1)]),
+    # ...and on Feb 29 in leap years
+    (date(2028, 2, 20), date(2028, 2, 28), [date(1985, 2, 28)]),
+    (date(2028, 2, 29), date(2028, 3, 7), [date(1992, 2, 29), date(1980, 3, 1)]),
+    # a whole year matches everyone
+    (date(2025, 6, 15), date(2026, 6, 15), [date(1990, 1, 5), date(1985, 2, 28), date(1992, 2, 29),
+                                            date(1980, 3, 1), date(1975, 12, 30), date(2000, 6, 15)]),
+])
+def test_birthday_between(sqlite_session, start_date, end_date, expected):
+    condition = ContactService._birthday_between(start_date, end_date)
+
+    birthdays = sqlite_session.scalars(select(Contact.birthday).where(condition).order_by(Contact.id)).all()
+
+    assert birthdays == expected
+
+
+def test_page_json_projection(sqlite_session, mock_current_user):
+    service = ContactService(db=None, user=mock_current_user)
+    query = service._get_contacts_for_user(("id", "first_name", "birthday")).order_by(Contact.id).limit(1)
+
+    rows = sqlite_session.execute(query).all()
+
+    assert json.loads(page_json(rows, "abc")) == {
+        "items": [{"id": 1, "first_name": "Contact", "birthday": "1990-01-05"}],
+        "next_cursor": "abc",
+    }
+
+
+def test_match_any_field_ranks_by_matching_fields(sqlite_session):
+    sqlite_session.add_all([
+        Contact(first_name="Joanna", last_name="Smith", email="js@example.com", phone="556",
+                birthday=date(1990, 1, 1), owner_id=1),
+        Contact(first_name="Ann", last_name="Annson", email="ann@example.com", phone="555",
+                birthday=date(1990, 1, 1), owner_id=1),
+    ])
+    sqlite_session.commit()
+
+    condition, score = ContactService._match_any_field("ann", "sqlite")
+
+    names = sqlite_session.scalars(
+        select(Contact.first_name).where(condition).order_by(score.desc(), Contact.id)
+    ).all()
+
+    assert names == ["Ann", "Joanna"]
+
+
+def test_match_any_field_uses_trigram_similarity_on_postgresql():
+    condition, score = ContactService._match_any_field("ann", "postgresql")
+
+    sql = str(select(Contact.id).where(condition).order_by(score.desc()).compile(dialect=postgresql.dialect()))
+
+    assert "contacts.first_name %%> " in sql
+    assert "greatest(word_similarity(" in sql
@@ -0,0 +1,84 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routers import contacts
+from app.services.contact_service import ContactService
+
+PAGE = '{"items":[],"next_cursor":null}'
+CONTACT = '{"id":5,"first_name":"Ada"}'
+
+
+@pytest.fixture(autouse=True)
+def redis():
+    # the contact versions behind the ETags live in (fake) Redis
+    redis = fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer(), decode_responses=True)
+    with patch("app.services.contact_cache.redis_client", redis):
+        yield redis
+
+
+@pytest.fixture
+def contact_service():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock()
+    service = ContactService(db=db, user=MagicMock(id=1))
+    service.get_all_contacts_json = AsyncMock(return_value=PAGE)
+    service.get_contact_json = AsyncMock(return_value=CONTACT)
+    return service
+
+
+@pytest.fixture
+def client(contact_service):
+    app = FastAPI()
+    app.include_router(contacts.router)
+    app.dependency_overrides[contacts.oauth2_scheme] = lambda: "token"
+    app.dependency_overrides[ContactService] = lambda: contact_service
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path, method", [("/contacts/", "get_all_contacts_json"), ("/contacts/5", "get_contact_json")])
+def test_read_with_matching_etag_is_not_modified(client, contact_service, path, method):
+    response = client.get(path)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+    getattr(contact_service, method).reset_mock()
+
+    response = client.get(path, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    # neither read from the database nor from the response cache
+    getattr(contact_service, method).assert_not_awaited()
+
+
+def test_read_with_other_etag_is_served(client, contact_service):
+    response = client.get("/contacts/", headers={"If-None-Match": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.text == PAGE
+    contact_service.get_all_contacts_json.assert_awaited_once()
+
+
+def test_write_changes_the_etag(client, contact_service):
+    etag = client.get("/contacts/").headers["etag"]
+    contact_service.db.execute.return_value.scalars.return_value.all.return_value = [5]
+
+    assert client.delete("/contacts/5").status_code == 200
+
+    response = client.get("/contacts/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.text == PAGE
+
+
+def test_read_without_redis_has_no_etag(client, contact_service):
+    with patch("app.services.contact_cache.redis_client.get", AsyncMock(side_effect=ConnectionError("down"))):
+        response = client.get("/contacts/", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 200
+    assert "etag" not in response.headers
@@ -0,0 +1,24 @@
+from app.utils.etag import etag_matches, make_etag
+
+
+def test_make_etag():
+    assert make_etag(12, 1700000000) == 'W/"12-1700000000"'
+    assert make_etag("abc", weak=False) == '"abc"'
+
+
+def test_etag_matches():
+    etag = make_etag(12, 7)
+
+    assert etag_matches('W/"12-7"', etag)
+    assert etag_matches('"12-7"', etag)
+    assert etag_matches('W/"12-6", W/"12-7"', etag)
+    assert etag_matches("*", etag)
+
+
+def test_etag_does_not_match():
+    etag = make_etag(12, 7)
+
+    assert not etag_matches(None, etag)
+    assert not etag_matches("", etag)
+    assert not etag_matches('W/"12-6"', etag)
+    assert not etag_matches('W/"12-70"', etag)
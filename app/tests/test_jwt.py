@@ -0,0 +1,59 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import jwt
+import pytest
+
+from app.config import Config
+from app.utils.jwt import create_access_token, verified_tokens, verify_access_token
+
+
+@pytest.fixture(autouse=True)
+def clear_verified_tokens():
+    verified_tokens.clear()
+
+
+def test_verify_access_token():
+    token = create_access_token({"sub": "test@example.com"})
+
+    assert verify_access_token(token) == "test@example.com"
+
+
+def test_verify_access_token_is_cached():
+    token = create_access_token({"sub": "test@example.com"})
+    verify_access_token(token)
+
+    with patch("app.utils.jwt.jwt.decode") as decode:
+        assert verify_access_token(token) == "test@example.com"
+
+    decode.assert_not_called()
+
+
+def test_verify_access_token_cache_expires_with_token():
+    token = create_access_token({"sub": "test@example.com"}, expires_delta=timedelta(seconds=30))
+    verify_access_token(token)
+
+    with patch("app.utils.cache.time.monotonic", return_value=time.monotonic() + 31), \
+            patch("app.utils.jwt.jwt.decode", side_effect=jwt.ExpiredSignatureError):
+        assert verify_access_token(token) is None
+
+
+def test_verify_access_token_expired():
+    token = create_access_token({"sub": "test@example.com"}, expires_delta=timedelta(seconds=-1))
+
+    assert verify_access_token(token) is None
+    assert len(verified_tokens) == 0
+
+
+def test_verify_access_token_invalid_signature():
+    token = jwt.encode({"sub": "test@example.com"}, "another-secret", algorithm=Config.ALGORITHM)
+
+    assert verify_access_token(token) is None
+    assert len(verified_tokens) == 0
+
+
+def test_verify_access_token_without_subject():
+    token = create_access_token({"role": "admin"})
+
+    assert verify_access_token(token) is None
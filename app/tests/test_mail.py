@@ -0,0 +1,169 @@
+import json
+import socket
+import time
+from email import message_from_bytes
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from app.services.mail_worker import MAIL_DEAD_KEY, MAIL_RETRY_KEY, MailWorker, TemplateRenderer
+from app.utils.mail import MAIL_QUEUE_KEY, enqueue_mail, send_reset_email, send_verification_email
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture
+def redis():
+    redis = MagicMock()
+    redis.lrem = AsyncMock()
+    redis.pipeline.return_value.__aenter__.return_value = pipe = MagicMock()
+    pipe.execute = AsyncMock()
+    return redis
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _queued(subject: str, attempts: int = 0) -> str:
+    return json.dumps({"id": subject.lower(), "recipients": ["user@example.com"], "subject": subject,
+                       "template_name": "reset_password_email.html",
+                       "template_body": {"reset_link": f"http://localhost/{subject}"}, "attempts": attempts})
+
+
+@pytest.mark.asyncio
+async def test_enqueue_mail():
+    with patch("app.utils.mail.redis_client") as redis:
+        redis.lpush = AsyncMock()
+        message_id = await enqueue_mail(["user@example.com"], "Hi", "verification_email.html", {"a": 1})
+
+    key, raw = redis.lpush.await_args.args
+    assert key == MAIL_QUEUE_KEY
+    assert json.loads(raw) == {"id": message_id, "recipients": ["user@example.com"], "subject": "Hi",
+                               "template_name": "verification_email.html", "template_body": {"a": 1},
+                               "attempts": 0}
+
+
+@pytest.mark.asyncio
+async def test_enqueue_mail_without_redis():
+    with patch("app.utils.mail.redis_client") as redis:
+        redis.lpush = AsyncMock(side_effect=ConnectionError("down"))
+        assert await enqueue_mail(["user@example.com"], "Hi", "verification_email.html", {}) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("send, template, link", [
+    (send_verification_email, "verification_email.html", "confirmation_link"),
+    (send_reset_email, "reset_password_email.html", "reset_link"),
+])
+async def test_send_functions_queue_templated_mail(send, template, link):
+    with patch("app.utils.mail.enqueue_mail", new_callable=AsyncMock) as enqueue:
+        await send("user@example.com", "token123")
+
+    recipients, _, template_name, template_body = enqueue.await_args.args
+    assert recipients == ["user@example.com"]
+    assert template_name == template
+    assert template_body[link].endswith("?token=token123")
+
+
+def test_template_renderer_compiles_templates_once():
+    renderer = TemplateRenderer()
+
+    assert set(renderer.templates) == {"verification_email.html", "reset_password_email.html"}
+    assert 'href="http://localhost/verify?a=1&amp;b=2"' in renderer.render(
+        "verification_email.html", {"confirmation_link": "http://localhost/verify?a=1&b=2"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_send_batch_reuses_connection(smtp_server, redis):
+    controller, handler = smtp_server
+    worker = MailWorker(redis=redis, hostname=controller.hostname, port=controller.port,
+                        username=None, start_tls=False)
+    batch = [_queued("First"), _queued("Second")]
+
+    assert await worker.send_batch(batch) == 2
+    assert await worker.send_batch([_queued("Third")]) == 1
+    await worker.close()
+
+    assert [message.rcpt_tos for message in handler.messages] == [["user@example.com"]] * 3
+    second = message_from_bytes(handler.messages[1].content)
+    assert second["Subject"] == "Second"
+    assert 'href="http://localhost/Second"' in second.get_payload(decode=True).decode()
+    assert len(handler.sessions) == 1
+    assert [call.args for call in redis.lrem.await_args_list] == [
+        (worker.processing_key, 1, raw) for raw in batch + [_queued("Third")]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_send_batch_retries_with_backoff(redis):
+    worker = MailWorker(redis=redis, hostname="127.0.0.1", port=_free_port(), username=None,
+                        start_tls=False, retry_delay=30)
+    raw = _queued("First", attempts=2)
+
+    assert await worker.send_batch([raw]) == 0
+
+    pipe = redis.pipeline.return_value.__aenter__.return_value
+    (key, scheduled), = (call.args for call in pipe.zadd.call_args_list)
+    (retry, due), = scheduled.items()
+    assert key == MAIL_RETRY_KEY
+    assert json.loads(retry)["attempts"] == 3
+    assert due == pytest.approx(time.time() + 120, abs=5)
+    pipe.lrem.assert_called_once_with(worker.processing_key, 1, raw)
+    redis.lrem.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_send_batch_gives_up_after_max_attempts(redis):
+    worker = MailWorker(redis=redis, hostname="127.0.0.1", port=_free_port(), username=None,
+                        start_tls=False, max_attempts=3)
+
+    await worker.send_batch([_queued("First", attempts=2), "not json"])
+
+    pipe = redis.pipeline.return_value.__aenter__.return_value
+    dead = [call.args for call in pipe.lpush.call_args_list]
+    assert [key for key, _ in dead] == [MAIL_DEAD_KEY, MAIL_DEAD_KEY]
+    assert json.loads(dead[0][1])["attempts"] == 3
+    assert dead[1][1] == "not json"
+    pipe.zadd.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_take_batch(redis):
+    worker = MailWorker(redis=redis, batch_size=3)
+    redis.blmove = AsyncMock(return_value="a")
+    redis.pipeline.return_value.__aenter__.return_value.execute.return_value = ["b", None]
+
+    assert await worker.take_batch() == ["a", "b"]
+    redis.blmove.assert_awaited_once_with(MAIL_QUEUE_KEY, worker.processing_key, 5, "RIGHT", "LEFT")
+
+
+@pytest.mark.asyncio
+async def test_take_batch_when_queue_is_empty(redis):
+    worker = MailWorker(redis=redis)
+    redis.blmove = AsyncMock(return_value=None)
+
+    assert await worker.take_batch() == []
+    redis.pipeline.assert_not_called()
@@ -0,0 +1,37 @@
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.repository.models import UserRole
+from app.services.authentication import get_current_user
+
+
+@pytest.fixture
+def client():
+    # not entered, so the startup handlers (Redis) don't run
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_metrics_requires_authentication(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 401
+    assert "db_pool" not in response.text
+
+
+def test_metrics_requires_admin(client):
+    app.dependency_overrides[get_current_user] = lambda: MagicMock(role=UserRole.USER)
+
+    assert client.get("/metrics").status_code == 403
+
+
+def test_metrics_for_admin(client):
+    app.dependency_overrides[get_current_user] = lambda: MagicMock(role=UserRole.ADMIN)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"db_pool", "user_cache", "contact_cache", "rate_limit"}
@@ -0,0 +1,40 @@
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.util import greenlet_spawn
+
+from app.repository.pool import InstrumentedAsyncPool, pool_metrics, pool_stats
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    pool_stats.clear()
+
+
+def _exhaust(pool):
+    connections = [pool.connect(), pool.connect()]
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+    return connections
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics():
+    pool = InstrumentedAsyncPool(MagicMock, pool_size=1, max_overflow=1, timeout=0.01)
+
+    connections = await greenlet_spawn(_exhaust, pool)
+
+    metrics = pool_metrics(pool)
+    assert metrics["size"] == 1
+    assert metrics["checked_out"] == 2
+    assert metrics["overflow"] == 1
+    assert metrics["checkouts"] == 2
+    assert metrics["overflow_checkouts"] == 1
+    assert metrics["timeouts"] == 1
+    assert metrics["max_wait_seconds"] >= 0.01  # the checkout that timed out
+    assert metrics["avg_wait_seconds"] == metrics["wait_seconds"] / 2
+
+    for connection in connections:
+        connection.close()
+    assert pool_metrics(pool)["checked_out"] == 0
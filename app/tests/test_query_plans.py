@@ -0,0 +1,125 @@
+"""
+Query plan regression tests.
+
+The queries of `ContactService` are captured from a mocked session and explained by SQLite
+(`EXPLAIN QUERY PLAN`) against the models' schema, to check that each is served by its owner-scoped
+index rather than a scan of the contacts table. Statements using PostgreSQL-only syntax
+(`= ANY(array)`, DELETE in a CTE) can't be explained by SQLite and are left out.
+"""
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.api.schemas import ContactCreate, ContactUpdate
+from app.repository.database import Base
+from app.repository.models import Contact, User
+from app.services.contact_service import ContactService
+from app.utils.pagination import encode_cursor, encode_sync_token
+
+CONTACT = ContactCreate(first_name="John", last_name="Doe", email="john@example.com", phone="123",
+                        birthday=date(1990, 1, 1), additional_info=None)
+
+
+@pytest.fixture(scope="module")
+def sqlite_engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def service():
+    session = AsyncMock()
+    session.get_bind = MagicMock()
+    session.get_bind.return_value.dialect.name = "sqlite"
+    session.execute.return_value = MagicMock()
+    session.execute.return_value.scalars.return_value.all.return_value = []
+    session.execute.return_value.all.return_value = []
+    session.scalar.return_value = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    async def get_or_build(owner_id, key, build, version=None):
+        return await build()
+
+    with patch("app.services.contact_service.contact_cache") as cache:
+        cache.bump_version = AsyncMock()
+        cache.get_or_build = AsyncMock(side_effect=get_or_build)
+        yield ContactService(db=session, user=User(id=1, email="test@example.com"))
+
+
+def _plan(engine, statement) -> str:
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def _statements(service) -> list:
+    return [call.args[0] for call in service.db.execute.call_args_list]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("call, index", [
+    (lambda service: service.get_all_contacts(limit=10), "ix_contacts_owner_id_id"),
+    (lambda service: service.get_all_contacts(limit=10, cursor=encode_cursor(5)), "ix_contacts_owner_id_id"),
+    (lambda service: service.get_all_contacts_json(limit=10, fields=["phone"]), "ix_contacts_owner_id_id"),
+    # any owner-scoped index serves the searches; which one SQLite picks depends on the index creation order
+    (lambda service: service.search_contacts(limit=10, last_name="Do"), "_contacts_owner_id_"),
+    (lambda service: service.search_contacts(limit=10, q="john"), "_contacts_owner_id_"),
+    (lambda service: service.get_upcoming_birthdays(date(2025, 1, 1), date(2025, 1, 8), limit=10),
+     "ix_contacts_owner_id_birthday_ordinal"),
+    (lambda service: service.get_changes(since=None, limit=10), "ix_contacts_owner_id_updated_at"),
+])
+async def test_contact_queries_use_owner_indexes(sqlite_engine, service, call, index):
+    await call(service)
+
+    for statement in _statements(service):
+        plan = _plan(sqlite_engine, statement)
+        assert index in plan and "(owner_id=" in plan, plan
+        assert "SCAN contacts" not in plan
+
+
+@pytest.mark.asyncio
+async def test_get_changes_uses_tombstone_index(sqlite_engine, service):
+    await service.get_changes(since=encode_sync_token(datetime(2025, 1, 1, tzinfo=timezone.utc), 3), limit=10)
+
+    contacts_plan, tombstones_plan = (_plan(sqlite_engine, statement) for statement in _statements(service))
+    assert "INDEX ix_contacts_owner_id_updated_at (owner_id=? AND updated_at>?)" in contacts_plan
+    assert "INDEX ix_deleted_contacts_owner_id_deleted_at (owner_id=? AND deleted_at>?)" in tombstones_plan
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("call", [
+    lambda service: service.get_contact_by_id(5),
+    lambda service: service.update_contact(5, CONTACT),
+    lambda service: service.patch_contact(5, ContactUpdate(phone="555")),
+])
+async def test_single_contact_queries_search_by_key(sqlite_engine, service, call):
+    await call(service)
+
+    plan = _plan(sqlite_engine, _statements(service)[0])
+    assert plan.startswith("SEARCH contacts USING"), plan
+
+
+@pytest.mark.asyncio
+async def test_export_uses_owner_index(sqlite_engine, service):
+    async def no_rows():
+        return
+        yield
+
+    export_session = AsyncMock()
+    export_session.stream.return_value.mappings = MagicMock(return_value=no_rows())
+    with patch("app.services.contact_service.AsyncSessionLocal") as session_factory:
+        session_factory.return_value.__aenter__.return_value = export_session
+        [row async for row in service.export_contacts()]
+
+    plan = _plan(sqlite_engine, export_session.stream.call_args.args[0])
+    assert "USING INDEX ix_contacts_owner_id_id" in plan
+
+
+def test_import_conflict_target_is_unique_per_owner():
+    # import_contacts relies on ON CONFLICT (owner_id, email), which needs a matching unique index
+    unique_indexes = {tuple(column.name for column in index.columns)
+                      for index in Contact.__table__.indexes if index.unique}
+    assert ("owner_id", "email") in unique_indexes
+    assert ("email",) not in unique_indexes
@@ -0,0 +1,183 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.jwt import create_access_token
+from app.utils.rate_limit import (RateLimit, RateLimiter, RateLimitMiddleware, client_identity, parse_rate,
+                                  rate_limit_stats)
+
+RULES = [
+    RateLimit("default", "100/minute"),
+    RateLimit("login", "5/minute", "/auth/login", "POST", per_user=False),
+]
+
+
+@pytest.fixture
+def limiter():
+    limiter = MagicMock()
+    limiter.hit = AsyncMock(return_value=(True, 4, 0.0))
+    return limiter
+
+
+@pytest.fixture
+def client(limiter):
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, rules=RULES, limiter=limiter)
+
+    @app.post("/auth/login")
+    async def login():
+        return {"message": "ok"}
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("rate, expected", [
+    ("10/minute", (10, 60)),
+    ("5/hour", (5, 3600)),
+    ("1000/Day", (1000, 86400)),
+])
+def test_parse_rate(rate, expected):
+    assert parse_rate(rate) == expected
+
+
+@pytest.mark.parametrize("rate", ["10", "ten/minute", "10/fortnight"])
+def test_parse_rate_rejects_invalid_rates(rate):
+    with pytest.raises(ValueError):
+        parse_rate(rate)
+
+
+def test_rule_matches_method_and_path():
+    default, login = RULES
+
+    assert default.matches("GET", "/contacts/")
+    assert login.matches("POST", "/auth/login")
+    assert not login.matches("GET", "/auth/login")
+    assert not login.matches("POST", "/auth/register")
+
+
+def test_client_identity():
+    token = create_access_token({"sub": "user@example.com"})
+    scope = {"type": "http", "client": ("10.0.0.1", 5000), "headers": [(b"authorization", f"Bearer {token}".encode())]}
+
+    assert client_identity(scope, per_user=True) == "user:user@example.com"
+    assert client_identity(scope, per_user=False) == "ip:10.0.0.1"
+    assert client_identity({**scope, "headers": [(b"authorization", b"Bearer invalid")]}, per_user=True) == "ip:10.0.0.1"
+
+
+@pytest.mark.asyncio
+async def test_limiter_checks_all_buckets_in_one_call():
+    redis = MagicMock()
+    redis.register_script.return_value = script = AsyncMock(return_value=[0, 0, 1500])
+    limiter = RateLimiter(redis=redis)
+
+    allowed, remaining, retry_after = await limiter.hit([("ip:10.0.0.1", rule) for rule in RULES])
+
+    assert (allowed, remaining, retry_after) == (False, 0, 1.5)
+    script.assert_awaited_once_with(
+        keys=["ratelimit:{ip:10.0.0.1}:default", "ratelimit:{ip:10.0.0.1}:login"],
+        args=[100, 60000, 5, 60000],
+    )
+
+
+@pytest.fixture
+def redis():
+    # fakeredis runs the Lua script itself (with lupa)
+    return fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer(), decode_responses=True)
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_script_allows_requests(redis):
+    limiter = RateLimiter(redis=redis)
+    buckets = [("ip:10.0.0.1", RateLimit("login", "3/minute"))]
+
+    assert await limiter.hit(buckets) == (True, 2, 0.0)
+    assert await limiter.hit(buckets) == (True, 1, 0.0)
+
+    key = "ratelimit:{ip:10.0.0.1}:login"
+    assert float(await redis.hget(key, "tokens")) == pytest.approx(1, abs=0.01)
+    assert 0 < await redis.pttl(key) <= 60000
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_script_rejects_without_consuming(redis):
+    limiter = RateLimiter(redis=redis)
+    buckets = [("ip:10.0.0.1", RateLimit("default", "100/minute")), ("ip:10.0.0.1", RateLimit("login", "2/minute"))]
+    await limiter.hit(buckets)
+    await limiter.hit(buckets)
+
+    allowed, remaining, retry_after = await limiter.hit(buckets)
+
+    assert (allowed, remaining) == (False, 0)
+    # one token of a 2/minute bucket comes back after 30 seconds
+    assert retry_after == pytest.approx(30, abs=0.1)
+    # a rejected request takes no token from any bucket
+    assert float(await redis.hget("ratelimit:{ip:10.0.0.1}:default", "tokens")) == pytest.approx(98, abs=0.01)
+    assert float(await redis.hget("ratelimit:{ip:10.0.0.1}:login", "tokens")) < 1
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_script_refills_over_time(redis):
+    limiter = RateLimiter(redis=redis)
+    key = "ratelimit:{ip:10.0.0.1}:login"
+    buckets = [("ip:10.0.0.1", RateLimit("login", "2/minute"))]
+    await limiter.hit(buckets)
+    await limiter.hit(buckets)
+    assert (await limiter.hit(buckets))[0] is False
+
+    # as if the last request was 30 seconds ago: one token refilled
+    await redis.hset(key, "ts", int(await redis.hget(key, "ts")) - 30000)
+
+    allowed, remaining, _ = await limiter.hit(buckets)
+    assert (allowed, remaining) == (True, 0)
+    assert (await limiter.hit(buckets))[0] is False
+
+
+def test_allowed_request_reports_remaining_requests(client, limiter):
+    response = client.post("/auth/login")
+
+    assert response.status_code == 200
+    assert response.headers["x-ratelimit-remaining"] == "4"
+    (buckets,) = limiter.hit.await_args.args
+    assert [(identity, rule.name) for identity, rule in buckets] == [
+        ("ip:testclient", "default"), ("ip:testclient", "login")
+    ]
+
+
+def test_rejected_request(client, limiter):
+    limiter.hit.return_value = (False, 0, 12.3)
+
+    response = client.post("/auth/login")
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "12"
+
+
+def test_unmatched_request_is_not_counted(limiter):
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, rules=RULES[1:], limiter=limiter)
+
+    @app.get("/")
+    async def root():
+        return {}
+
+    assert TestClient(app).get("/").status_code == 200
+    limiter.hit.assert_not_called()
+
+
+def test_requests_pass_when_redis_is_unavailable(client, limiter):
+    limiter.hit.side_effect = ConnectionError("down")
+    errors = rate_limit_stats["errors"]
+
+    response = client.post("/auth/login")
+
+    assert response.status_code == 200
+    assert "x-ratelimit-remaining" not in response.headers
+    assert rate_limit_stats["errors"] == errors + 1
+
+
+def test_invalid_rule_fails_on_startup(limiter):
+    with pytest.raises(ValueError):
+        RateLimitMiddleware(FastAPI(), rules=[RateLimit("broken", "often")], limiter=limiter)
@@ -0,0 +1,55 @@
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.utils.upload_limit import BodyLimit, BodySizeLimitMiddleware
+
+MAX_SIZE = 1000
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, limits=[BodyLimit("/upload", "PUT", MAX_SIZE)])
+    app.state.handled = 0
+
+    @app.put("/upload")
+    async def upload(file: UploadFile = File(...)):
+        app.state.handled += 1
+        return {"size": len(await file.read())}
+
+    @app.post("/upload")
+    async def other_method(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+
+def test_upload_within_limit(client):
+    response = client.put("/upload", files={"file": ("avatar", b"x" * 500)})
+
+    assert response.status_code == 200
+    assert response.json() == {"size": 500}
+
+
+def test_declared_length_over_limit_is_rejected_before_parsing(client):
+    response = client.put("/upload", files={"file": ("avatar", b"x" * 2000)})
+
+    assert response.status_code == 413
+    assert client.app.state.handled == 0
+
+
+def test_chunked_body_over_limit_is_rejected(client):
+    body = b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a\"\r\n\r\n" + b"x" * 2000 + b"\r\n--b--\r\n"
+
+    response = client.put("/upload", content=(body[i:i + 100] for i in range(0, len(body), 100)),
+                          headers={"Content-Type": "multipart/form-data; boundary=b"})
+
+    assert response.status_code == 413
+    assert client.app.state.handled == 0
+
+
+def test_other_routes_are_not_limited(client):
+    response = client.post("/upload", files={"file": ("avatar", b"x" * 2000)})
+
+    assert response.status_code == 200
@@ -0,0 +1,141 @@
+from unittest.mock import AsyncMock, patch
+
+import asyncio
+
+import pytest
+
+from app.repository.models import User, UserRole
+from app.services import user_cache
+from app.services.user_cache import (
+    cache_stats, cache_user, deserialize_user, get_cached_user, invalidate_cached_user, listen_for_invalidations,
+    local_cache, serialize_user
+)
+
+
+@pytest.fixture
+def mock_redis():
+    with patch.object(user_cache, "redis_client", new=AsyncMock()) as redis:
+        yield redis
+
+
+@pytest.fixture(autouse=True)
+def reset_cache():
+    cache_stats.clear()
+    local_cache.clear()
+
+
+def test_serialize_user_round_trip():
+    user = User(id=1, email="admin@example.com", is_verified=True, is_active=True,
+                avatar="avatars/1.png", role=UserRole.ADMIN)
+
+    restored = deserialize_user(serialize_user(user))
+
+    assert restored.id == 1
+    assert restored.email == "admin@example.com"
+    assert restored.avatar == "avatars/1.png"
+    assert restored.role is UserRole.ADMIN
+
+
+@pytest.mark.asyncio
+async def test_get_cached_user_hit(mock_redis):
+    mock_redis.get.return_value = serialize_user(User(id=1, email="test@example.com", role=UserRole.USER))
+
+    user = await get_cached_user("test@example.com")
+
+    mock_redis.get.assert_awaited_once_with("user:test@example.com")
+    assert user.id == 1
+    assert user.role is UserRole.USER
+    assert cache_stats == {"hits": 1}
+
+
+@pytest.mark.asyncio
+async def test_get_cached_user_local_hit(mock_redis):
+    mock_redis.get.return_value = serialize_user(User(id=1, email="test@example.com", role=UserRole.USER))
+    first = await get_cached_user("test@example.com")
+
+    second = await get_cached_user("test@example.com")
+
+    mock_redis.get.assert_awaited_once()
+    assert second.id == 1
+    assert second is not first
+    assert cache_stats == {"hits": 1, "local_hits": 1}
+
+
+@pytest.mark.asyncio
+async def test_get_cached_user_miss(mock_redis):
+    mock_redis.get.return_value = None
+
+    user = await get_cached_user("test@example.com")
+
+    assert user is None
+    assert cache_stats == {"misses": 1}
+
+
+@pytest.mark.asyncio
+async def test_get_cached_user_redis_unavailable(mock_redis):
+    mock_redis.get.side_effect = ConnectionError("Redis is down")
+
+    user = await get_cached_user("test@example.com")
+
+    assert user is None
+    assert cache_stats == {"errors": 1}
+
+
+@pytest.mark.asyncio
+async def test_cache_user(mock_redis):
+    user = User(id=1, email="test@example.com", role=UserRole.USER)
+
+    await cache_user(user)
+
+    mock_redis.set.assert_awaited_once_with("user:test@example.com", serialize_user(user), ex=user_cache.CACHE_TTL)
+    assert (await get_cached_user("test@example.com")).id == 1
+    mock_redis.get.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_invalidate_cached_user(mock_redis):
+    await cache_user(User(id=1, email="test@example.com", role=UserRole.USER))
+
+    await invalidate_cached_user("test@example.com")
+
+    mock_redis.delete.assert_awaited_once_with("user:test@example.com")
+    mock_redis.publish.assert_awaited_once_with(user_cache.INVALIDATION_CHANNEL, "test@example.com")
+    assert local_cache.get("test@example.com") is None
+
+
+class MockPubSub:
+    """Stands in for a Redis pub/sub subscription; messages are delivered through a queue."""
+    def __init__(self):
+        self.messages = asyncio.Queue()
+        self.subscribe = AsyncMock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def listen(self):
+        while True:
+            yield await self.messages.get()
+
+
+@pytest.mark.asyncio
+async def test_listen_for_invalidations(mock_redis):
+    pubsub = MockPubSub()
+    mock_redis.pubsub = lambda: pubsub
+    local_cache.set("stale@example.com", {"id": 1})
+
+    listener = asyncio.create_task(listen_for_invalidations())
+    await asyncio.sleep(0.01)
+    local_cache.set("other@example.com", {"id": 2})
+    local_cache.set("kept@example.com", {"id": 3})
+    pubsub.messages.put_nowait({"type": "subscribe", "data": 1})
+    pubsub.messages.put_nowait({"type": "message", "data": "other@example.com"})
+    await asyncio.sleep(0.01)
+    listener.cancel()
+
+    pubsub.subscribe.assert_awaited_once_with(user_cache.INVALIDATION_CHANNEL)
+    assert local_cache.get("stale@example.com") is None  # cleared on (re)subscribe
+    assert local_cache.get("other@example.com") is None
+    assert local_cache.get("kept@example.com") == {"id": 3}
@@ -1,8 +1,9 @@
 from unittest.mock import MagicMock, patch, AsyncMock
 
 import pytest
-from fastapi import BackgroundTasks
+from passlib.context import CryptContext
 
+from app.config import Config
 from app.repository.models import User
 from app.services.user_service import UserService
 
@@ -10,19 +11,22 @@ from app.services.user_service import UserService
 # Mocking dependencies
 @pytest.fixture
 def mock_db_session():
-    return MagicMock()
+    session = AsyncMock()
+    session.add = MagicMock()
+    session.execute.return_value = MagicMock()
+    return session
 
 
 @pytest.mark.asyncio
 async def test_get_user_by_email(mock_db_session):
     mock_user = User(id=1, email="test@example.com", is_verified=True)
-    mock_db_session.query.return_value.filter.return_value.first.return_value = mock_user
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = mock_user
 
     service = UserService(db=mock_db_session)
 
-    user = service.get_user_by_email(email="test@example.com")
+    user = await service.get_user_by_email(email="test@example.com")
 
-    mock_db_session.query.assert_called_once()
+    mock_db_session.execute.assert_awaited_once()
     assert user.email == "test@example.com"
 
 
@@ -30,53 +34,119 @@ async def test_get_user_by_email(mock_db_session):
 async def test_create_user(mock_db_session):
     service = UserService(db=mock_db_session)
 
-    user = service.create_user(email="newuser@example.com", password="password123")
+    user = await service.create_user(email="newuser@example.com", password="password123")
 
     mock_db_session.add.assert_called_once()
-    mock_db_session.commit.assert_called_once()
-    mock_db_session.refresh.assert_called_once_with(user)
+    mock_db_session.commit.assert_awaited_once()
+    mock_db_session.refresh.assert_awaited_once_with(user)
     assert user.email == "newuser@example.com"
     assert user.hashed_password is not None
 
 
 @pytest.mark.asyncio
 async def test_create_user_with_verification(mock_db_session):
-    mock_background_tasks = MagicMock(spec=BackgroundTasks)
     service = UserService(db=mock_db_session)
 
     with patch("app.services.user_service.create_email_verification_token", return_value="token123") as mock_token, \
-            patch("app.utils.mail.send_verification_email", new_callable=AsyncMock):
-        user = await service.create_user_with_verification(
-            email="test@example.com", password="password123", background_tasks=mock_background_tasks
-        )
+            patch("app.services.user_service.send_verification_email", new_callable=AsyncMock) as mock_send:
+        user = await service.create_user_with_verification(email="test@example.com", password="password123")
 
         mock_token.assert_called_once_with("test@example.com")
-        mock_db_session.commit.assert_called()
+        mock_db_session.commit.assert_awaited()
         assert user.email == "test@example.com"
         assert user.verification_token == "token123"
+        mock_send.assert_awaited_once_with("test@example.com", "token123")
 
 
 @pytest.mark.asyncio
 async def test_resend_verification_email(mock_db_session):
     mock_user = User(email="test@example.com", verification_token=None)
-    mock_background_tasks = MagicMock(spec=BackgroundTasks)
     service = UserService(db=mock_db_session)
 
     with patch("app.services.user_service.create_email_verification_token", return_value="token456") as mock_token, \
-            patch("app.utils.mail.send_verification_email", new_callable=AsyncMock):
-        await service.resend_verification_email(user=mock_user, background_tasks=mock_background_tasks)
+            patch("app.services.user_service.send_verification_email", new_callable=AsyncMock) as mock_send:
+        await service.resend_verification_email(user=mock_user)
 
         mock_token.assert_called_once_with("test@example.com")
-        mock_db_session.commit.assert_called()
+        mock_db_session.commit.assert_awaited()
         assert mock_user.verification_token == "token456"
+        mock_send.assert_awaited_once_with("test@example.com", "token456")
 
 
 @pytest.mark.asyncio
 async def test_verify_password(mock_db_session):
     service = UserService(db=mock_db_session)
     plain_password = "password123"
-    hashed_password = service.create_user("test@example.com", plain_password).hashed_password
+    hashed_password = (await service.create_user("test@example.com", plain_password)).hashed_password
 
-    result = service.verify_password(plain_password, hashed_password)
+    result = await service.verify_password(plain_password, hashed_password)
 
     assert result is True
+
+
+@pytest.mark.asyncio
+async def test_authenticate_rehashes_password_with_outdated_cost(mock_db_session):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("password123")
+    mock_user = User(id=1, email="test@example.com", hashed_password=old_hash)
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = mock_user
+    service = UserService(db=mock_db_session)
+
+    user = await service.authenticate("test@example.com", "password123")
+
+    assert user is mock_user
+    assert user.hashed_password != old_hash
+    assert user.hashed_password.startswith(f"$2b${Config.BCRYPT_ROUNDS:02d}$")
+    mock_db_session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_authenticate_keeps_current_hash(mock_db_session):
+    service = UserService(db=mock_db_session)
+    mock_user = await service.create_user("test@example.com", "password123")
+    mock_db_session.reset_mock()
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = mock_user
+    current_hash = mock_user.hashed_password
+
+    user = await service.authenticate("test@example.com", "password123")
+
+    assert user.hashed_password == current_hash
+    mock_db_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_authenticate_wrong_password(mock_db_session):
+    hashed_password = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("password123")
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = User(
+        email="test@example.com", hashed_password=hashed_password
+    )
+    service = UserService(db=mock_db_session)
+
+    assert await service.authenticate("test@example.com", "wrong") is None
+    mock_db_session.commit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_authenticate_unknown_user(mock_db_session):
+    mock_db_session.execute.return_value.scalars.return_value.first.return_value = None
+    service = UserService(db=mock_db_session)
+
+    assert await service.authenticate("nobody@example.com", "password123") is None
+
+
+@pytest.mark.asyncio
+async def test_update_avatar(mock_db_session):
+    mock_db_session.get.return_value = stored_user = User(id=1, email="test@example.com")
+    upload = MagicMock()
+    service = UserService(db=mock_db_session)
+
+    with patch("app.services.user_service.store_avatar", new_callable=AsyncMock, return_value="abc123") as store, \
+            patch("app.services.user_service.link_user_avatar") as link, \
+            patch("app.services.user_service.invalidate_cached_user", new_callable=AsyncMock) as invalidate:
+        user = await service.update_avatar(User(id=1, email="test@example.com"), upload)
+
+    store.assert_awaited_once_with(upload)
+    link.assert_called_once_with(1, "abc123")
+    assert user is stored_user
+    assert user.avatar == "abc123"
+    mock_db_session.commit.assert_awaited_once()
+    invalidate.assert_awaited_once_with("test@example.com")
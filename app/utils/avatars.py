@@ -0,0 +1,221 @@
+"""
+Avatar Images.
+
+Uploaded avatars are streamed to disk in chunks, up to `AVATAR_MAX_SIZE` bytes, and identified by
+their content rather than by the content type the client declared. Decoding and resizing are
+CPU-bound, so they run in a process pool, off the event loop. Each upload becomes square WebP
+variants (`AVATAR_SIZES`), and the original is not kept. Variants are named after the SHA-256 of the
+upload, so identical uploads share their files and are processed only once.
+
+Before that, `User.avatar` held the path of the uploaded file; `convert_legacy_avatar` turns those files
+into variants (see the `convert_legacy_avatars` migration).
+
+A user's current avatar is a set of symlinks, `users/{user_id}_{size}.webp`, pointing at the variants
+of their upload. Serving an avatar resolves the link on disk and needs neither the database nor Redis.
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, ImageOps
+
+from app.config import Config
+
+CHUNK_SIZE = 64 * 1024  # bytes
+AVATAR_SIZES = (64, 256)  # pixels, square
+WEBP_QUALITY = 80
+MAX_PIXELS = 40_000_000  # largest decoded image, against decompression bombs
+
+# Accepted image types and their signatures, as (offset, magic bytes)
+IMAGE_SIGNATURES = {
+    "image/jpeg": ((0, b"\xff\xd8\xff"),),
+    "image/png": ((0, b"\x89PNG\r\n\x1a\n"),),
+    "image/webp": ((0, b"RIFF"), (8, b"WEBP")),
+}
+
+AVATAR_DIGEST = re.compile(r"[0-9a-f]{64}")
+AVATAR_FILENAME = re.compile(r"[0-9a-f]{64}_(\d+)\.webp")
+
+# Spawned rather than forked: forking a process running an event loop and thread pools isn't safe
+avatar_executor = ProcessPoolExecutor(max_workers=Config.AVATAR_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+def sniff_image_type(head: bytes) -> str | None:
+    """Identify an accepted image type from the first bytes of a file."""
+    for content_type, signature in IMAGE_SIGNATURES.items():
+        if all(head[offset:offset + len(magic)] == magic for offset, magic in signature):
+            return content_type
+    return None
+
+
+def avatar_filename(digest: str, size: int) -> str:
+    return f"{digest}_{size}.webp"
+
+
+def is_avatar_digest(value: str) -> bool:
+    """Check that a `User.avatar` value is a digest, rather than the file path stored by earlier versions."""
+    return AVATAR_DIGEST.fullmatch(value) is not None
+
+
+def is_avatar_filename(filename: str) -> bool:
+    """Check that a filename names an avatar variant (and so can't point outside `AVATAR_DIR`)."""
+    match = AVATAR_FILENAME.fullmatch(filename)
+    return match is not None and int(match.group(1)) in AVATAR_SIZES
+
+
+def temporary_path(path: str) -> str:
+    """A unique name next to `path`, to write it under before renaming it into place."""
+    # unique per call, as uploads run concurrently within a process as well as across workers
+    return f"{path}.{uuid.uuid4().hex}.tmp"
+
+
+def avatar_path(digest: str, size: int) -> str:
+    return os.path.join(Config.AVATAR_DIR, avatar_filename(digest, size))
+
+
+def user_avatar_link(user_id: int, size: int) -> str:
+    return os.path.join(Config.AVATAR_DIR, "users", f"{user_id}_{size}.webp")
+
+
+def choose_avatar_size(size: int) -> int:
+    """The smallest variant at least `size` pixels wide, or the largest one."""
+    return next((variant for variant in AVATAR_SIZES if variant >= size), AVATAR_SIZES[-1])
+
+
+def link_user_avatar(user_id: int, digest: str) -> None:
+    """Point a user's avatar links at the variants of `digest`."""
+    os.makedirs(os.path.join(Config.AVATAR_DIR, "users"), exist_ok=True)
+    for size in AVATAR_SIZES:
+        link = user_avatar_link(user_id, size)
+        temporary = temporary_path(link)
+        os.symlink(os.path.join(os.pardir, avatar_filename(digest, size)), temporary)
+        # replacing the link is atomic, so readers see either the old avatar or the new one
+        os.replace(temporary, link)
+
+
+def resolve_user_avatar(user_id: int, size: int) -> tuple[str, os.stat_result] | None:
+    """
+    Find the variant file a user's avatar link points at.
+
+    Returns:
+        tuple[str, os.stat_result] | None: The variant's filename (content-addressed) and its stat,
+        or None if the user has no avatar.
+    """
+    try:
+        filename = os.path.basename(os.readlink(user_avatar_link(user_id, size)))
+        return filename, os.stat(os.path.join(Config.AVATAR_DIR, filename))
+    except FileNotFoundError:
+        return None
+
+
+async def save_upload(upload: UploadFile, directory: str, max_size: int) -> tuple[str, str]:
+    """
+    Stream an uploaded image to a temporary file in `directory`.
+
+    Returns:
+        tuple[str, str]: The path of the file and the SHA-256 hex digest of its content.
+
+    Raises:
+        ValueError: If the upload is empty, larger than `max_size` bytes or not an accepted image type.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".upload")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            while chunk := await upload.read(CHUNK_SIZE):
+                if size == 0 and sniff_image_type(chunk) is None:
+                    raise ValueError("Invalid file type. Only JPEG, PNG and WebP allowed.")
+                size += len(chunk)
+                if size > max_size:
+                    raise ValueError(f"File too large. Avatars are limited to {max_size} bytes.")
+                digest.update(chunk)
+                await run_in_threadpool(file.write, chunk)
+        if size == 0:
+            raise ValueError("Empty file.")
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+
+def process_avatar(source: str, digest: str, directory: str, sizes: tuple[int, ...] = AVATAR_SIZES) -> list[str]:
+    """Write the square WebP variants of an image. Runs in `avatar_executor`."""
+    paths = []
+    with Image.open(source) as image:
+        if image.width * image.height > MAX_PIXELS:
+            raise ValueError("Image dimensions too large.")
+        # JPEGs can be decoded at a fraction of their size, still at least as large as the biggest variant
+        image.draft("RGB", (max(sizes), max(sizes)))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        for size in sizes:
+            variant = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            path = os.path.join(directory, avatar_filename(digest, size))
+            # written under a temporary name, so a variant is never served half-written
+            temporary = temporary_path(path)
+            try:
+                variant.save(temporary, "WEBP", quality=WEBP_QUALITY)
+                os.replace(temporary, path)
+            except BaseException:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+                raise
+            paths.append(path)
+    return paths
+
+
+async def store_avatar(upload: UploadFile) -> str:
+    """
+    Store an uploaded avatar as WebP variants in `AVATAR_DIR`.
+
+    Returns:
+        str: The digest naming the avatar's variants (see `avatar_path`).
+
+    Raises:
+        ValueError: If the upload isn't an accepted image within the size limit.
+    """
+    os.makedirs(Config.AVATAR_DIR, exist_ok=True)
+    source, digest = await save_upload(upload, Config.AVATAR_DIR, Config.AVATAR_MAX_SIZE)
+    try:
+        if not all(os.path.exists(avatar_path(digest, size)) for size in AVATAR_SIZES):
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(avatar_executor, process_avatar, source, digest, Config.AVATAR_DIR)
+            except (OSError, Image.DecompressionBombError) as e:
+                raise ValueError("Invalid image.") from e
+    finally:
+        os.remove(source)
+    return digest
+
+
+def convert_legacy_avatar(path: str) -> str | None:
+    """
+    Store an avatar file saved by earlier versions as WebP variants in `AVATAR_DIR`. The file is kept.
+
+    Returns:
+        str | None: The digest naming the variants, or None if the file is missing or not an accepted image.
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+    if sniff_image_type(data[:16]) is None:
+        return None
+    digest = hashlib.sha256(data).hexdigest()
+    os.makedirs(Config.AVATAR_DIR, exist_ok=True)
+    if not all(os.path.exists(avatar_path(digest, size)) for size in AVATAR_SIZES):
+        try:
+            process_avatar(path, digest, Config.AVATAR_DIR)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return None
+    return digest
@@ -0,0 +1,62 @@
+"""
+Caching utilities.
+
+Holds the Redis client shared by the application (kept outside of `app.main` so services can use it
+without importing the application module) and a small in-process LRU cache with expiring entries.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from redis import asyncio as aioredis
+
+from app.config import Config
+
+# Global Redis client
+redis_client = aioredis.from_url(Config.REDIS_URL, decode_responses=True)
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries expire after a time-to-live.
+
+    Not shared between processes: each worker keeps its own copy.
+
+    Attributes:
+        maxsize (int): Maximum number of entries; the least recently used entry is evicted first.
+        ttl (float): Default time-to-live of an entry, in seconds.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value cached for `key`, or `default` if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Cache `value` for `key`, for `ttl` seconds (the cache default if not given)."""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Remove `key` from the cache, if present."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,129 @@
+"""
+Response Compression.
+
+ASGI middleware compressing responses with brotli or gzip, whichever the client prefers (brotli on a tie).
+Streaming responses, such as contact exports, are compressed chunk by chunk as they are sent.
+"""
+import zlib
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# already compressed (images, e.g. avatars) or meant to reach the client right away
+UNCOMPRESSED_CONTENT_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip",
+                              "text/event-stream")
+COMPRESSIBLE_IMAGE_TYPES = ("image/svg+xml",)
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Pick the content coding for an `Accept-Encoding` header: "br", "gzip" or None (highest q-value, then brotli)."""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                continue
+        accepted[coding.strip()] = q
+    q = {coding: accepted.get(coding, accepted.get("*", 0)) for coding in ("br", "gzip")}
+    # max() keeps the first of equal q-values, so brotli wins ties
+    coding = max(q, key=q.get)
+    return coding if q[coding] > 0 else None
+
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return (content_type.startswith(COMPRESSIBLE_IMAGE_TYPES)
+            or not content_type.startswith(UNCOMPRESSED_CONTENT_TYPES))
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        # a sync flush makes each chunk of a stream decodable as soon as it arrives
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        compressed = self._compressor.process(data)
+        return compressed + (self._compressor.finish() if finish else self._compressor.flush())
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least `minimum_size` bytes.
+
+    Responses that are already encoded or whose content type doesn't compress (see
+    `UNCOMPRESSED_CONTENT_TYPES`) are sent as they are. Streaming responses are always compressed,
+    as their size isn't known up front.
+
+    Args:
+        app (ASGIApp): The application.
+        minimum_size (int): Smallest body compressed, in bytes.
+        gzip_level (int): zlib compression level, 1 (fastest) to 9 (smallest).
+        brotli_quality (int): Brotli quality, 0 (fastest) to 11 (smallest).
+    """
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message = {}
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # held back until the first body chunk tells whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start["headers"])
+                if ("content-encoding" in headers or not is_compressible(headers.get("content-type", ""))
+                        or (not more_body and len(body) < self.minimum_size)):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+                compressor = (BrotliCompressor(self.brotli_quality) if encoding == "br"
+                              else GzipCompressor(self.gzip_level))
+                body = compressor.compress(body, finish=not more_body)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                await send({**message, "body": body})
+                return
+
+            await send({**message, "body": compressor.compress(body, finish=not more_body)})
+
+        await self.app(scope, receive, send_compressed)
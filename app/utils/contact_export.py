@@ -0,0 +1,53 @@
+"""
+Contact Export Formatting.
+
+Serializers for contact exports. They turn a stream of contact rows into a stream of text chunks,
+so an export can be sent while it is being read from the database.
+"""
+import csv
+import io
+import json
+from typing import AsyncIterator, Mapping
+
+EXPORT_FIELDS = ("id", "first_name", "last_name", "email", "phone", "birthday", "additional_info")
+ROWS_PER_CHUNK = 500
+
+
+async def _chunked(rows: AsyncIterator[Mapping], write_row, buffer: io.StringIO) -> AsyncIterator[str]:
+    count = 0
+    async for row in rows:
+        write_row(row)
+        count += 1
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def to_csv(rows: AsyncIterator[Mapping]) -> AsyncIterator[str]:
+    """Format contact rows as CSV with a header row."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    async for chunk in _chunked(rows, writer.writerow, buffer):
+        yield chunk
+
+
+async def to_ndjson(rows: AsyncIterator[Mapping]) -> AsyncIterator[str]:
+    """Format contact rows as newline-delimited JSON, one object per contact."""
+    buffer = io.StringIO()
+
+    def write_row(row: Mapping):
+        buffer.write(json.dumps({field: row[field] for field in EXPORT_FIELDS}, default=str))
+        buffer.write("\n")
+
+    async for chunk in _chunked(rows, write_row, buffer):
+        yield chunk
+
+
+EXPORT_FORMATS = {
+    "csv": (to_csv, "text/csv"),
+    "ndjson": (to_ndjson, "application/x-ndjson"),
+}
@@ -0,0 +1,90 @@
+"""
+Contact Import Parsing.
+
+Incremental parsers for bulk contact imports. They consume the request body chunk by chunk and
+yield one `(row_number, data, error)` tuple per row, so an import never holds the whole file in memory.
+A row that can't be parsed has `data` set to None and `error` describing the problem.
+"""
+import codecs
+import csv
+import json
+from typing import AsyncIterator
+
+ParsedRow = tuple[int, dict | None, str | None]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a stream of UTF-8 byte chunks into lines, keeping the line endings."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        # the last line may continue in the next chunk
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """Parse newline-delimited JSON: one contact object per line."""
+    row_number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(data, dict):
+            yield row_number, None, "Expected a JSON object"
+            continue
+        yield row_number, data, None
+
+
+async def _iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # a quoted field may contain line breaks, so a record ends only where the quotes are balanced
+    record = ""
+    async for line in iter_lines(chunks):
+        record += line
+        if record.count('"') % 2 == 0:
+            yield record
+            record = ""
+    if record:
+        yield record
+
+
+async def parse_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    """
+    Parse CSV with a header row naming the contact fields.
+
+    Empty cells are treated as missing values.
+    """
+    header = None
+    row_number = 0
+    async for record in _iter_csv_records(chunks):
+        if not record.strip():
+            continue
+        try:
+            values = next(csv.reader([record]))
+        except csv.Error as e:
+            values, error = None, f"Invalid CSV: {e}"
+        else:
+            error = None
+        if header is None:
+            if values is None:
+                yield 0, None, error
+                return
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if values is None:
+            yield row_number, None, error
+        elif len(values) != len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+        else:
+            yield row_number, {name: value or None for name, value in zip(header, values)}, None
@@ -0,0 +1,25 @@
+"""
+ETag Utilities.
+
+Helpers for conditional requests: building entity tags and matching them against `If-None-Match`.
+"""
+
+
+def make_etag(*parts, weak: bool = True) -> str:
+    """Build an entity tag from the given parts, e.g. `W/"12-1700000000"`."""
+    tag = '"' + "-".join(str(part) for part in parts) + '"'
+    return f"W/{tag}" if weak else tag
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Check whether an `If-None-Match` header matches an entity tag.
+
+    Uses the weak comparison required for `If-None-Match`, so `W/"x"` and `"x"` match each other.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
@@ -0,0 +1,42 @@
+"""
+Password Hashing Utilities.
+
+bcrypt is deliberately slow and CPU-bound, so hashing and verification run in a dedicated, bounded
+thread pool instead of on the event loop (bcrypt releases the GIL while hashing, so threads use all cores).
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from app.config import Config
+
+# Hashes with a different cost than BCRYPT_ROUNDS (lower or higher) are reported as needing a rehash
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=Config.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=Config.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=Config.BCRYPT_ROUNDS,
+)
+
+# Bounds the number of concurrent hashes, so a burst of logins can't starve the rest of the process
+password_executor = ThreadPoolExecutor(max_workers=Config.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password with the configured bcrypt cost."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verify a password against its hash.
+
+    Returns:
+        tuple[bool, str | None]: Whether the password matches and, if the hash was made with a
+        different bcrypt cost than the configured one, a new hash of the password to store instead.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.verify_and_update, password, hashed_password)
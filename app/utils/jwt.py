@@ -1,32 +1,53 @@
 """
 JWT Utilities.
 """
-from datetime import datetime, timedelta
+import hashlib
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Union
 
+import jwt
 from fastapi import HTTPException
-from jose import JWTError, jwt
 
 from app.config import Config
+from app.utils.cache import TTLCache
+
+# Subjects of already verified tokens, keyed by token digest. Entries never outlive the token's expiry.
+verified_tokens = TTLCache(maxsize=Config.JWT_CACHE_SIZE, ttl=Config.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
 
 def create_access_token(data: dict, expires_delta: Union[timedelta, None] = None):
     to_encode = data.copy()
-    expire = datetime.now() + (expires_delta or timedelta(minutes=Config.ACCESS_TOKEN_EXPIRE_MINUTES))
+    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=Config.ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, Config.SECRET_KEY, algorithm=Config.ALGORITHM)
     return encoded_jwt
 
 def verify_access_token(token: str):
+    """
+    Verify a token and return its subject (the user's email).
+
+    A token verified once is served from `verified_tokens` until it expires,
+    so repeated requests with the same token skip decoding and signature checks.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    email = verified_tokens.get(key)
+    if email is not None:
+        return email
+
     try:
         payload = jwt.decode(token, Config.SECRET_KEY, algorithms=[Config.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return email
-    except JWTError:
+    except jwt.PyJWTError:
+        return None
+    email: str = payload.get("sub")
+    if email is None:
         return None
 
+    expires_in = payload.get("exp", 0) - time.time()
+    if expires_in > 0:
+        verified_tokens.set(key, email, ttl=expires_in)
+    return email
+
 
 def create_email_verification_token(email: str):
     data = {"sub": email}
@@ -1,56 +1,64 @@
 """
 This module contains functions for sending emails.
-The configuration for sending emails is performed using fastapi_mail ConnectionConfig class.
+
+Emails aren't sent from the web workers: they are pushed to a Redis list and delivered by the mail
+worker (`python -m app.services.mail_worker`), which keeps one SMTP connection open for all of them.
 """
-from fastapi import BackgroundTasks
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-from pydantic import EmailStr
+import json
+import logging
 import os
+import uuid
+
+from pydantic import EmailStr
 
 from app.config import Config
+from app.utils.cache import redis_client
+
+logger = logging.getLogger(__name__)
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-conf = ConnectionConfig(
-    MAIL_USERNAME=Config.MAIL_USERNAME,
-    MAIL_PASSWORD=Config.MAIL_PASSWORD,
-    MAIL_FROM=Config.MAIL_FROM,
-    MAIL_FROM_NAME="Contacts App",
-    MAIL_PORT=int(Config.MAIL_PORT),
-    MAIL_SERVER=Config.MAIL_SERVER,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=os.path.join(BASE_DIR, "templates")
-)
-
-
-async def send_verification_email(email: EmailStr, token: str, background_tasks: BackgroundTasks):
+TEMPLATE_FOLDER = os.path.join(BASE_DIR, "templates")
+
+# Messages waiting to be sent: pushed on the left, taken from the right by the mail worker
+MAIL_QUEUE_KEY = "mail:queue"
+
+
+async def enqueue_mail(recipients: list[str], subject: str, template_name: str, template_body: dict) -> str | None:
+    """
+    Queue an email rendered from one of the templates in `TEMPLATE_FOLDER`.
+
+    Returns:
+        str | None: The id of the queued message, or None if Redis is unavailable.
+    """
+    message = {
+        "id": uuid.uuid4().hex,
+        "recipients": recipients,
+        "subject": subject,
+        "template_name": template_name,
+        "template_body": template_body,
+        "attempts": 0,
+    }
+    try:
+        await redis_client.lpush(MAIL_QUEUE_KEY, json.dumps(message))
+    except Exception as e:
+        logger.error(f"Failed to queue email '{subject}' to {', '.join(recipients)}: {str(e)}")
+        return None
+    return message["id"]
+
+
+async def send_verification_email(email: EmailStr, token: str) -> str | None:
     """
     Send a verification email to the user.
     Parameters:
         email (EmailStr): The email address of the user.
         token (str): The verification token.
-        background_tasks (BackgroundTasks): The background tasks object.
     """
     link = f"{Config.APP_BASE_URL}/auth/verify-email?token={token}"
-    message = MessageSchema(
-        subject="Welcome! Confirm Your Email",
-        recipients=[email],
-        template_body={"confirmation_link": link},
-        subtype="html",
-    )
-    fm = FastMail(conf)
-    print(f"Sending email to {email} with token {token}")
-    background_tasks.add_task(fm.send_message, message, template_name="verification_email.html")
-
-
-async def send_reset_email(email: EmailStr, token: str, background_tasks: BackgroundTasks):
+    return await enqueue_mail([email], "Welcome! Confirm Your Email", "verification_email.html",
+                              {"confirmation_link": link})
+
+
+async def send_reset_email(email: EmailStr, token: str) -> str | None:
     link = f"{Config.APP_BASE_URL}/auth/reset-password?token={token}"
-    message = MessageSchema(
-        subject="Password Reset Request",
-        recipients=[email],
-        template_body={"reset_link": link},
-        subtype="html",
-    )
-    fm = FastMail(conf)
-    background_tasks.add_task(fm.send_message, message, template_name="reset_password_email.html")
+    return await enqueue_mail([email], "Password Reset Request", "reset_password_email.html",
+                              {"reset_link": link})
@@ -0,0 +1,48 @@
+"""
+Cursor Pagination Utilities.
+
+Cursors are opaque to API clients; internally they carry the id of the last row of the previous page,
+so the next page can be fetched with a keyset condition (`id > last_id`) instead of an OFFSET.
+Sync tokens work the same way for change feeds, keyed by (updated_at, id).
+"""
+import base64
+from datetime import datetime
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encode the id of the last row of a page into an opaque cursor."""
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded).decode())
+    except ValueError as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def encode_sync_token(updated_at: datetime, last_id: int) -> str:
+    """Encode the position of the last change sent to a client into an opaque sync token."""
+    return base64.urlsafe_b64encode(f"{updated_at.isoformat()}|{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> tuple[datetime, int]:
+    """
+    Decode a sync token produced by `encode_sync_token`.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        updated_at, last_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(updated_at), int(last_id)
+    except ValueError as e:
+        raise ValueError("Invalid sync token") from e
@@ -0,0 +1,183 @@
+"""
+Rate Limiting.
+
+Requests are limited with token buckets kept in Redis, so a limit holds across all workers. A rule
+allowing `limit` requests per `period` refills its bucket continuously, which allows bursts of up to
+`limit` requests. All the buckets a request counts against are checked and updated by a single Lua
+script, in one round trip; if any of them is empty the request is rejected with 429 and consumes none.
+"""
+import logging
+from collections import Counter
+from typing import NamedTuple
+
+from redis.asyncio import Redis
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.cache import redis_client
+from app.utils.jwt import verify_access_token
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Per-process statistics: allowed and limited requests, and Redis errors (requests let through)
+rate_limit_stats = Counter()
+
+# KEYS: one bucket per rule; ARGV: limit and period (ms) of each bucket, in the same order.
+# Returns {allowed (0/1), tokens left in the emptiest bucket, ms until a request would be allowed}.
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local allowed = 1
+local retry_after = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[2 * i - 1])
+    local period = tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local left = tonumber(bucket[1]) or limit
+    local elapsed = math.max(0, now - (tonumber(bucket[2]) or now))
+    left = math.min(limit, left + elapsed * limit / period)
+    if left < 1 then
+        allowed = 0
+        retry_after = math.max(retry_after, math.ceil((1 - left) * period / limit))
+    end
+    tokens[i] = left
+end
+local remaining = nil
+for i, key in ipairs(KEYS) do
+    local left = tokens[i] - allowed
+    redis.call('HSET', key, 'tokens', left, 'ts', now)
+    redis.call('PEXPIRE', key, ARGV[2 * i])
+    if remaining == nil or left < remaining then
+        remaining = left
+    end
+end
+return {allowed, math.floor(remaining), retry_after}
+"""
+
+
+def parse_rate(rate: str) -> tuple[int, int]:
+    """Parse a rate such as "10/minute" into (limit, period in seconds)."""
+    limit, _, period = rate.partition("/")
+    try:
+        return int(limit), PERIODS[period.strip().lower()]
+    except (ValueError, KeyError):
+        raise ValueError(f"Invalid rate: {rate!r}, expected e.g. '10/minute'") from None
+
+
+class RateLimit(NamedTuple):
+    """
+    A rate limit rule.
+
+    Attributes:
+        name (str): Name of the rule, part of its buckets' keys.
+        rate (str): Allowed requests, e.g. "10/minute".
+        path (str | None): Path the rule applies to, or None for every path.
+        method (str | None): HTTP method the rule applies to, or None for every method.
+        per_user (bool): Count requests per authenticated user (anonymous ones per IP) rather than per IP.
+    """
+    name: str
+    rate: str
+    path: str | None = None
+    method: str | None = None
+    per_user: bool = True
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.path is None or self.path == path) and (self.method is None or self.method == method)
+
+
+class RateLimiter:
+    """Checks requests against their token buckets in Redis."""
+    def __init__(self, redis: Redis = redis_client, prefix: str = "ratelimit"):
+        self.prefix = prefix
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def hit(self, buckets: list[tuple[str, RateLimit]]) -> tuple[bool, int, float]:
+        """
+        Count a request against buckets, given as (client identity, rule) pairs.
+
+        Returns:
+            tuple[bool, int, float]: Whether the request is allowed, the requests left in the
+            emptiest bucket, and the seconds to wait before retrying a rejected request.
+
+        Raises:
+            redis.RedisError: If Redis is unavailable.
+        """
+        keys, args = [], []
+        for identity, rule in buckets:
+            limit, period = parse_rate(rule.rate)
+            # the hash tag keeps all of a client's buckets in one slot of a Redis cluster
+            keys.append(f"{self.prefix}:{{{identity}}}:{rule.name}")
+            args += [limit, period * 1000]
+        allowed, remaining, retry_after = await self._script(keys=keys, args=args)
+        return bool(allowed), remaining, retry_after / 1000
+
+
+def client_identity(scope: Scope, per_user: bool) -> str:
+    """Identify the client of a request: by the user of its bearer token if `per_user`, else by IP."""
+    if per_user:
+        scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and token:
+            # verified tokens are cached, so this rarely decodes the token again
+            email = verify_access_token(token)
+            if email:
+                return f"user:{email}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    Apply rate limit rules to requests.
+
+    A request counts against every rule matching its method and path. When Redis is unavailable
+    requests are let through.
+
+    Args:
+        app (ASGIApp): The application.
+        rules (list[RateLimit]): The rules.
+        limiter (RateLimiter | None): Limiter holding the buckets; one on the shared Redis client by default.
+    """
+    def __init__(self, app: ASGIApp, rules: list[RateLimit], limiter: RateLimiter | None = None):
+        self.app = app
+        self.rules = rules
+        self.limiter = limiter or RateLimiter()
+        for rule in rules:
+            parse_rate(rule.rate)  # fail on startup rather than on the first request
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rules = [rule for rule in self.rules if rule.matches(scope["method"], scope["path"])]
+        if not rules:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            allowed, remaining, retry_after = await self.limiter.hit(
+                [(client_identity(scope, rule.per_user), rule) for rule in rules]
+            )
+        except Exception as e:
+            rate_limit_stats["errors"] += 1
+            logger.error(f"Rate limiter unavailable: {str(e)}")
+            await self.app(scope, receive, send)
+            return
+
+        if not allowed:
+            rate_limit_stats["limited"] += 1
+            response = JSONResponse({"detail": "Too many requests"}, status_code=429,
+                                    headers={"Retry-After": str(max(1, round(retry_after)))})
+            await response(scope, receive, send)
+            return
+        rate_limit_stats["allowed"] += 1
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-RateLimit-Remaining"] = str(remaining)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,64 @@
+"""
+Request Body Limits.
+
+FastAPI parses (and spools to disk) a multipart body before the route runs, so a size check in the route
+only happens once the whole upload has been received. This ASGI middleware enforces a limit on the body
+of some routes before then: requests declaring a larger `Content-Length` are rejected with 413 without
+reading their body, and bodies sent without one (chunked) are counted as they are read.
+"""
+from typing import NamedTuple
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# room for the multipart boundaries and part headers around an uploaded file
+MULTIPART_OVERHEAD = 16 * 1024  # bytes
+
+
+class BodyLimit(NamedTuple):
+    """Largest body, in bytes, of the requests to `path` with `method`."""
+    path: str
+    method: str
+    max_size: int
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject requests whose body is larger than the limit of their route with 413.
+
+    Args:
+        app (ASGIApp): The application.
+        limits (list[BodyLimit]): The limits; requests matching none are passed through.
+    """
+    def __init__(self, app: ASGIApp, limits: list[BodyLimit]):
+        self.app = app
+        self.limits = {(limit.method.upper(), limit.path): limit.max_size for limit in limits}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        max_size = self.limits.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if max_size is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None and (not content_length.isdigit() or int(content_length) > max_size):
+            response = JSONResponse({"detail": f"Request body too large. The limit is {max_size} bytes."},
+                                    status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_limited() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_size:
+                    # raised while the body is parsed, before the route runs
+                    raise HTTPException(413, f"Request body too large. The limit is {max_size} bytes.")
+            return message
+
+        await self.app(scope, receive_limited, send)
@@ -0,0 +1,62 @@
+"""
+Benchmark: sync vs async database access under concurrency.
+
+Simulates N concurrent clients that each run a per-request query similar to `GET /contacts/`:
+- sync: `SessionLocal` queries dispatched through Starlette's threadpool (40 workers by default),
+  the way FastAPI runs plain `def` endpoints;
+- async: `AsyncSessionLocal` queries awaited directly on the event loop.
+
+Requires a reachable database (DATABASE_URL) with migrations applied.
+
+Usage:
+    python -m benchmarks.bench_async_db --clients 200 --requests 20
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+
+from app.repository.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.repository.models import Contact
+
+
+def _sync_request(owner_id: int) -> int:
+    with SessionLocal() as db:
+        return len(db.execute(select(Contact).where(Contact.owner_id == owner_id).limit(50)).scalars().all())
+
+
+async def _async_request(owner_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Contact).where(Contact.owner_id == owner_id).limit(50))
+        return len(result.scalars().all())
+
+
+async def _run(label: str, request, clients: int, requests_per_client: int, owner_id: int) -> None:
+    async def client():
+        for _ in range(requests_per_client):
+            await request(owner_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    total = clients * requests_per_client
+    print(f"{label:>5}: {total} requests in {elapsed:.2f}s -> {total / elapsed:.0f} req/s")
+
+
+async def main(clients: int, requests_per_client: int, owner_id: int) -> None:
+    print(f"{clients} concurrent clients x {requests_per_client} requests")
+    await _run("sync", lambda oid: run_in_threadpool(_sync_request, oid), clients, requests_per_client, owner_id)
+    await _run("async", _async_request, clients, requests_per_client, owner_id)
+    engine.dispose()
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--owner-id", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.clients, args.requests, args.owner_id))
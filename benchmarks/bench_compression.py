@@ -0,0 +1,71 @@
+"""
+Benchmark: response compression bandwidth/latency trade-off.
+
+For contact list pages of several sizes, serialised like the listing endpoints (`page_json`),
+prints per coding and level: the compressed size, the compression time, and the resulting time
+to deliver the page (compression + transfer) over links of several bandwidths.
+
+Usage:
+    python -m benchmarks.bench_compression --sizes 10 100 1000 5000
+"""
+import argparse
+import time
+from collections import namedtuple
+from datetime import date
+
+from app.services.contact_service import CONTACT_FIELDS, page_json
+from app.utils.compression import BrotliCompressor, GzipCompressor
+
+ContactRow = namedtuple("ContactRow", CONTACT_FIELDS)
+CODINGS = [
+    ("identity", None),
+    ("gzip 1", lambda: GzipCompressor(1)),
+    ("gzip 6", lambda: GzipCompressor(6)),
+    ("gzip 9", lambda: GzipCompressor(9)),
+    ("br 1", lambda: BrotliCompressor(1)),
+    ("br 4", lambda: BrotliCompressor(4)),
+    ("br 11", lambda: BrotliCompressor(11)),
+]
+LINKS = {"1 Mbit/s": 1e6, "10 Mbit/s": 10e6, "100 Mbit/s": 100e6}  # bits per second
+
+
+def _page(size: int) -> bytes:
+    rows = [
+        ContactRow(first_name=f"First{i}", last_name=f"Last{i}", email=f"contact{i}@example.com",
+                   phone=f"+38050{i:07d}", birthday=date(1990, 1 + i % 12, 1 + i % 28),
+                   additional_info="Met at the conference." if i % 3 else None, id=i)
+        for i in range(size)
+    ]
+    return page_json(rows, None).encode()
+
+
+def _compress(make_compressor, body: bytes, repeat: int) -> tuple[int, float]:
+    if make_compressor is None:
+        return len(body), 0.0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compressed = make_compressor().compress(body, finish=True)
+    return len(compressed), (time.perf_counter() - start) / repeat
+
+
+def main(sizes: list[int], repeat: int) -> None:
+    for size in sizes:
+        body = _page(size)
+        print(f"\n{size} contacts ({len(body)} bytes)")
+        print(f"{'coding':>10} {'bytes':>9} {'ratio':>6} {'compress ms':>12}"
+              + "".join(f"{link + ' ms':>15}" for link in LINKS))
+        for label, make_compressor in CODINGS:
+            compressed_size, seconds = _compress(make_compressor, body, repeat)
+            delivery = "".join(
+                f"{(seconds + compressed_size * 8 / bandwidth) * 1000:>15.2f}" for bandwidth in LINKS.values()
+            )
+            print(f"{label:>10} {compressed_size:>9} {len(body) / compressed_size:>6.1f} {seconds * 1000:>12.3f}"
+                  + delivery)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    main(args.sizes, args.repeat)
@@ -0,0 +1,48 @@
+"""
+Benchmark: access token verification throughput.
+
+Compares, in tokens verified per second:
+- python-jose `jwt.decode` (the previous backend, if installed);
+- PyJWT `jwt.decode`;
+- `verify_access_token` with its verification cache (the same token verified repeatedly,
+  as happens across the requests of one session).
+
+Usage:
+    python -m benchmarks.bench_jwt --iterations 50000
+"""
+import argparse
+import time
+
+import jwt
+
+from app.config import Config
+from app.utils.jwt import create_access_token, verify_access_token
+
+
+def _measure(label: str, verify, iterations: int) -> None:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        verify()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>28}: {iterations / elapsed:>10.0f} tokens/s")
+
+
+def main(iterations: int) -> None:
+    token = create_access_token({"sub": "benchmark@example.com"})
+
+    try:
+        from jose import jwt as jose_jwt
+    except ImportError:
+        print(f"{'python-jose':>28}: not installed")
+    else:
+        _measure("python-jose", lambda: jose_jwt.decode(token, Config.SECRET_KEY, algorithms=[Config.ALGORITHM]),
+                 iterations)
+    _measure("PyJWT", lambda: jwt.decode(token, Config.SECRET_KEY, algorithms=[Config.ALGORITHM]), iterations)
+    _measure("verify_access_token (cached)", lambda: verify_access_token(token), iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+    main(args.iterations)
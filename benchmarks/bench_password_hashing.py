@@ -0,0 +1,48 @@
+"""
+Benchmark: login (bcrypt verification) throughput per core.
+
+For each bcrypt cost, verifies passwords concurrently through a thread pool of the given size,
+the way `app.utils.hashing` does, and reports logins/s overall and per worker thread.
+
+Usage:
+    python -m benchmarks.bench_password_hashing --rounds 10 11 12 13 --workers 1 4
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+
+async def _verify_concurrently(context: CryptContext, hashed: str, workers: int, logins: int) -> float:
+    loop = asyncio.get_running_loop()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, context.verify, "correct horse battery staple", hashed)
+            for _ in range(logins)
+        ))
+        return time.perf_counter() - start
+
+
+async def main(rounds_list: list[int], workers_list: list[int], logins: int) -> None:
+    print(f"{'rounds':>6} {'workers':>7} {'ms/login':>9} {'logins/s':>9} {'per core':>9}")
+    for rounds in rounds_list:
+        context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        hashed = context.hash("correct horse battery staple")
+        for workers in workers_list:
+            elapsed = await _verify_concurrently(context, hashed, workers, logins)
+            throughput = logins / elapsed
+            print(f"{rounds:>6} {workers:>7} {elapsed / logins * workers * 1000:>9.1f} "
+                  f"{throughput:>9.1f} {throughput / workers:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds, args.workers, args.logins))
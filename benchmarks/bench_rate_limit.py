@@ -0,0 +1,88 @@
+"""
+Benchmark: rate limiter overhead per request.
+
+Against a running Redis, prints:
+- the latency of a limiter check (one Lua script call) for one and two buckets;
+- the throughput and mean latency of requests to a minimal application, without the rate limit
+  middleware and with it (default rule, and default plus a per-route rule), at a given concurrency.
+
+The limits are set high enough that no request is rejected.
+
+Usage:
+    python -m benchmarks.bench_rate_limit --redis-url redis://localhost:6379/0 --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+from redis import asyncio as aioredis
+
+from app.config import Config
+from app.utils.rate_limit import RateLimit, RateLimiter, RateLimitMiddleware
+
+DEFAULT = RateLimit("bench-default", "1000000/second")
+ROUTE = RateLimit("bench-route", "1000000/second", "/ping", "GET")
+
+
+def _app(limiter: RateLimiter, rules: list[RateLimit] | None) -> FastAPI:
+    app = FastAPI()
+    if rules:
+        app.add_middleware(RateLimitMiddleware, rules=rules, limiter=limiter)
+
+    @app.get("/ping")
+    async def ping():
+        return {"message": "pong"}
+
+    return app
+
+
+async def _bench_checks(limiter: RateLimiter, iterations: int) -> None:
+    for label, buckets in (("1 bucket", [("ip:bench", DEFAULT)]),
+                           ("2 buckets", [("ip:bench", DEFAULT), ("ip:bench", ROUTE)])):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await limiter.hit(buckets)
+        elapsed = time.perf_counter() - start
+        print(f"{'check, ' + label:>28}: {elapsed / iterations * 1e6:>8.0f} us")
+
+
+async def _bench_requests(limiter: RateLimiter, requests: int, concurrency: int) -> None:
+    for label, rules in (("no limiter", None), ("default rule", [DEFAULT]), ("default + route rule", [DEFAULT, ROUTE])):
+        transport = httpx.ASGITransport(app=_app(limiter, rules))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            latencies = []
+
+            async def worker(count: int) -> None:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    response = await client.get("/ping")
+                    latencies.append(time.perf_counter() - start)
+                    assert response.status_code == 200
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+        print(f"{label:>28}: {len(latencies) / elapsed:>8.0f} req/s, "
+              f"{sum(latencies) / len(latencies) * 1e6:>8.0f} us mean latency")
+
+
+async def main(redis_url: str, requests: int, concurrency: int) -> None:
+    redis = aioredis.from_url(redis_url, decode_responses=True)
+    limiter = RateLimiter(redis=redis, prefix="ratelimit-bench")
+    try:
+        await _bench_checks(limiter, requests)
+        await _bench_requests(limiter, requests, concurrency)
+    finally:
+        await redis.delete(*[key async for key in redis.scan_iter("ratelimit-bench:*")] or ["ratelimit-bench"])
+        await redis.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default=Config.REDIS_URL)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.redis_url, args.requests, args.concurrency))